@@ -0,0 +1,388 @@
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import degrees
+from util import Node, StackFrontier, QueueFrontier
+
+FIRST_NAMES = (
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Emma",
+    "Kevin", "Tom", "Sally", "Gary", "Demi", "Jack", "Robin", "Chris",
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+    "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Bacon", "Cruise", "Hanks", "Field", "Sinise", "Wright", "Watson",
+)
+TITLE_WORDS = (
+    "Night", "Return", "Last", "City", "Love", "Dark", "Star", "War", "Man",
+    "Secret", "Lost", "Blood", "King", "Dream", "House", "River", "Story",
+    "Apollo", "Good", "Men", "Time", "Road", "Fire", "Game", "Wild",
+)
+
+# Shape of the real dataset: people and movies per credit, and how
+# unevenly credits are spread over people (a Pareto shape parameter)
+PEOPLE_PER_CREDIT = 0.88
+MOVIES_PER_CREDIT = 0.29
+PARETO_ALPHA = 1.5
+
+
+class ListStackFrontier():
+    """
+    The original list-backed frontier, kept for comparison.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def compare_searches(pairs, searches):
+    """
+    Runs every search strategy over the same (source, target) pairs.
+    Returns a dictionary mapping each strategy to its total
+    nodes explored and total wall time in seconds.
+    """
+    results = {}
+    for search in searches:
+        explored = 0
+        start = time.perf_counter()
+        for source, target in pairs:
+            _, num_explored = degrees.find_path(source, target, search)
+            explored += num_explored
+        results[search] = {
+            "explored": explored,
+            "seconds": time.perf_counter() - start,
+        }
+    return results
+
+
+def time_frontier(frontier_class, n):
+    """
+    Pushes n nodes through a frontier, checking membership before
+    each push, then pops them all.
+    Returns the average time per node in nanoseconds.
+    """
+    frontier = frontier_class()
+    start = time.perf_counter()
+    for state in range(n):
+        if not frontier.contains_state(state):
+            frontier.add(Node(state=state, parent=None, action=None))
+    while not frontier.empty():
+        frontier.remove()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def random_pairs(n, seed):
+    """
+    Returns n random (source, target) pairs of person ids,
+    drawn from people who starred in at least one movie.
+    """
+    rng = random.Random(seed)
+    if degrees.graph is not None:
+        person_ids = sorted(degrees.graph.person_ids)
+    else:
+        person_ids = sorted(degrees.people)
+    person_ids = [p for p in person_ids if degrees.movie_count(p)]
+    return [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(n)
+    ]
+
+
+def parse_scale(scale):
+    """
+    Parses a number of credits such as 10k or 1M.
+    """
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = scale[-1].lower()
+    if suffix in multipliers:
+        return int(float(scale[:-1]) * multipliers[suffix])
+    return int(scale)
+
+
+def generate_dataset(directory, credits, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with about `credits`
+    credits to directory, shaped like the IMDb data: a few people
+    star in very many movies and most in one or two.
+    """
+    rng = random.Random(seed)
+    num_people = max(1, int(credits * PEOPLE_PER_CREDIT))
+    num_movies = max(1, int(credits * MOVIES_PER_CREDIT))
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            birth = rng.randint(1900, 2005) if rng.random() < 0.8 else ""
+            writer.writerow([i + 1, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(num_movies):
+            title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 4)))
+            writer.writerow([i + 1, title, rng.randint(1920, 2020)])
+
+    # Heavy-tailed popularity, so some people get most of the credits
+    weights = [rng.paretovariate(PARETO_ALPHA) for _ in range(num_people)]
+    total = 0
+    cumulative = []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    del weights
+
+    with open(os.path.join(directory, "stars.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        batch = 100_000
+        for start in range(0, credits, batch):
+            k = min(batch, credits - start)
+            chosen = rng.choices(range(num_people), cum_weights=cumulative,
+                                 k=k)
+            writer.writerows(
+                (person + 1, rng.randrange(num_movies) + 1)
+                for person in chosen
+            )
+
+
+def percentile(values, p):
+    """
+    Returns the nearest-rank p-th percentile of values.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_benchmark(directory, pairs=20, seed=0, compact=False, cache=False,
+                  searches=None):
+    """
+    Loads the dataset in directory and times every search over seeded
+    random pairs. Returns a JSON-serialisable dictionary of load time,
+    dataset size, per-search latency percentiles and nodes explored,
+    and the peak resident set size of this process.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, compact, cache)
+    load_seconds = time.perf_counter() - start
+
+    if degrees.graph is not None:
+        size = {
+            "people": degrees.graph.num_people(),
+            "movies": degrees.graph.num_movies(),
+            "credits": len(degrees.graph.person_movies),
+        }
+    else:
+        size = {
+            "people": len(degrees.people),
+            "movies": len(degrees.movies),
+            "credits": sum(len(p["movies"]) for p in degrees.people.values()),
+        }
+
+    results = {}
+    query_pairs = random_pairs(pairs, seed)
+    for search in searches or degrees.SEARCHES:
+        latencies = []
+        explored = []
+        for source, target in query_pairs:
+            start = time.perf_counter()
+            _, num_explored = degrees.find_path(source, target, search)
+            latencies.append((time.perf_counter() - start) * 1000)
+            explored.append(num_explored)
+        results[search] = {
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies),
+            "explored_total": sum(explored),
+            "explored_p50": percentile(explored, 50),
+        }
+
+    return {
+        "directory": directory,
+        "compact": compact,
+        "cache": cache,
+        "pairs": pairs,
+        "seed": seed,
+        **size,
+        "load_seconds": load_seconds,
+        "searches": results,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / 1024,
+    }
+
+
+def benchmark_generate(args):
+    generate_dataset(args.directory, parse_scale(args.credits), args.seed)
+
+
+def benchmark_run(args):
+    result = run_benchmark(args.directory, args.pairs, args.seed,
+                           args.compact, args.cache)
+    print(json.dumps(result, indent=2))
+
+
+def benchmark_suite(args):
+    # Each scale runs in a fresh process so that peak RSS is its own
+    results = []
+    for scale in args.scales.split(","):
+        directory = os.path.join(args.data, scale)
+        if not os.path.exists(os.path.join(directory, "stars.csv")):
+            print(f"Generating {scale} credits in {directory}...",
+                  file=sys.stderr)
+            generate_dataset(directory, parse_scale(scale), args.seed)
+        command = [
+            sys.executable, os.path.abspath(__file__), "run", directory,
+            "--pairs", str(args.pairs), "--seed", str(args.seed),
+        ]
+        if args.compact:
+            command.append("--compact")
+        if args.cache:
+            command.append("--cache")
+        print(f"Running {scale}...", file=sys.stderr)
+        output = subprocess.run(command, check=True, capture_output=True,
+                                text=True).stdout
+        result = json.loads(output)
+        result["scale"] = scale
+        results.append(result)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    for result in results:
+        for search, stats in result["searches"].items():
+            print(f"  {result['scale']:>5} {search:>14}: "
+                  f"load {result['load_seconds']:.2f}s, "
+                  f"p50 {stats['p50_ms']:.2f}ms, "
+                  f"p99 {stats['p99_ms']:.2f}ms, "
+                  f"{stats['explored_total']} explored, "
+                  f"{result['peak_rss_mb']:.0f} MB peak")
+
+
+def benchmark_search(args):
+    degrees.load_data(args.directory, args.compact)
+    searches = list(degrees.SEARCHES)
+    if args.landmarks:
+        degrees.use_landmarks(args.directory, args.landmarks)
+        searches.append("astar")
+    pairs = random_pairs(args.pairs, args.seed)
+    results = compare_searches(pairs, searches)
+
+    print(f"{len(pairs)} random pairs from {args.directory}")
+    for search, result in results.items():
+        print(f"  {search:>14}: {result['explored']:>10} explored, "
+              f"{result['seconds']:.3f}s")
+
+
+def benchmark_frontier(args):
+    # The list frontiers are quadratic, so they get a smaller run
+    # and are compared on time per node
+    runs = [
+        (StackFrontier, args.nodes),
+        (QueueFrontier, args.nodes),
+        (ListStackFrontier, args.legacy_nodes),
+        (ListQueueFrontier, args.legacy_nodes),
+    ]
+    for frontier_class, n in runs:
+        ns = time_frontier(frontier_class, n)
+        print(f"  {frontier_class.__name__:>17}: {n:>8} nodes, "
+              f"{ns:10.1f} ns/node")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="compare search strategies")
+    search.add_argument("directory", nargs="?", default="large")
+    search.add_argument("--pairs", type=int, default=100)
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--compact", action="store_true",
+                        help="search the compact CSR graph")
+    search.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="also compare A* with K landmarks (needs "
+                             "--compact)")
+    search.set_defaults(run=benchmark_search)
+
+    frontier = commands.add_parser("frontier", help="frontier push/pop")
+    frontier.add_argument("--nodes", type=int, default=1_000_000)
+    frontier.add_argument("--legacy-nodes", type=int, default=20_000)
+    frontier.set_defaults(run=benchmark_frontier)
+
+    generate = commands.add_parser("generate", help="write a synthetic dataset")
+    generate.add_argument("directory")
+    generate.add_argument("credits", help="number of credits, e.g. 100k")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.set_defaults(run=benchmark_generate)
+
+    for name, help in (("run", "benchmark one dataset as JSON"),
+                       ("suite", "benchmark synthetic datasets by scale")):
+        command = commands.add_parser(name, help=help)
+        if name == "run":
+            command.add_argument("directory")
+            command.set_defaults(run=benchmark_run)
+        else:
+            command.add_argument("--scales", default="10k,100k,1M",
+                                 help="comma-separated credit counts, "
+                                      "up to 10M")
+            command.add_argument("--data", default="synthetic",
+                                 help="where the datasets are generated")
+            command.add_argument("--output", default="benchmark.json")
+            command.set_defaults(run=benchmark_suite)
+        command.add_argument("--pairs", type=int, default=20)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--compact", action="store_true")
+        command.add_argument("--cache", action="store_true",
+                             help="load through the binary snapshot")
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
+import argparse
 import csv
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import landmarks as landmark_index
+import snapshot
+from graph import Graph
+from nameindex import NameIndex, normalize
+from util import LRUCache, Node, StackFrontier, QueueFrontier
 from csv import reader
 
 # Maps names to a set of corresponding person_ids
@@ -13,10 +19,72 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of people and movies
+# when the data is loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Optional LandmarkIndex over graph, used by the astar search
+landmarks = None
+
+# Optional NameIndex over the keys of names, for prefix and fuzzy lookups
+name_index = None
+
+# Optional LRUCache of recent (source, target, search) results
+path_cache = None
+
+# Bytes of each CSV file already loaded, by directory and file name,
+# so that rows appended later can be picked up by ingest_appended
+loaded_sizes = {}
+
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Columns each CSV file must have, as used by apply_rows
+COLUMNS = {
+    "people.csv": ("id", "name", "birth"),
+    "movies.csv": ("id", "title", "year"),
+    "stars.csv": ("person_id", "movie_id"),
+}
+
+
+def load_data(directory, compact=False, cache=True, index_names=False):
     """
     Load data from CSV files into memory.
+
+    If compact, the people and movies are kept in a CSR Graph
+    rather than in the people and movies dictionaries.
+    If cache, the data is read from a binary snapshot next to the
+    CSV files, which is (re)written whenever they have changed.
+    If index_names, a NameIndex is built for prefix and fuzzy lookups.
+    """
+    global name_index
+    if path_cache is not None:
+        path_cache.clear()
+
+    if cache:
+        loaded = snapshot.load_or_build(directory)
+    elif compact:
+        loaded = Graph.from_csv(directory)
+    else:
+        loaded = None
+        load_csv(directory)
+
+    if loaded is None:
+        pass
+    elif compact:
+        use_graph(loaded)
+    else:
+        load_graph_dicts(loaded)
+
+    name_index = NameIndex(names) if index_names else None
+    loaded_sizes[directory] = {
+        filename: os.path.getsize(os.path.join(directory, filename))
+        for filename in CSV_FILES
+    }
+
+
+def load_csv(directory):
+    """
+    Load data from CSV files into the people and movies dictionaries.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -27,10 +95,10 @@ def load_data(directory):
                 "birth": row["birth"],
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if normalize(row["name"]) not in names:
+                names[normalize(row["name"])] = {row["id"]}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[normalize(row["name"])].add(row["id"])
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
@@ -53,24 +121,236 @@ def load_data(directory):
                 pass
 
 
+def use_graph(loaded):
+    """
+    Use a compact graph for all lookups and searches.
+    """
+    global graph, landmarks
+    graph = loaded
+    landmarks = None
+    for person_id, name in zip(graph.person_ids, graph.person_names):
+        names.setdefault(normalize(name), set()).add(person_id)
+
+
+def load_graph_dicts(loaded):
+    """
+    Fill the people and movies dictionaries from a compact graph.
+    """
+    for i, person_id in enumerate(loaded.person_ids):
+        name = loaded.person_names[i]
+        people[person_id] = {
+            "name": name,
+            "birth": loaded.person_births[i],
+            "movies": set()
+        }
+        names.setdefault(normalize(name), set()).add(person_id)
+
+    movie_ids = list(loaded.movie_ids)
+    for i, movie_id in enumerate(movie_ids):
+        movies[movie_id] = {
+            "title": loaded.movie_titles[i],
+            "year": loaded.movie_years[i],
+            "stars": set()
+        }
+
+    person_ids = list(loaded.person_ids)
+    for i, person_id in enumerate(person_ids):
+        stars = people[person_id]["movies"]
+        for j in range(loaded.person_offsets[i], loaded.person_offsets[i + 1]):
+            movie_id = movie_ids[loaded.person_movies[j]]
+            stars.add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+
+
+def apply_rows(people_rows=(), movie_rows=(), star_rows=()):
+    """
+    Adds people, movies and credits, given as dictionaries in the CSV
+    schema, to the loaded data in place, keeping names, name_index and
+    the compact graph consistent. Credits naming unknown people or
+    movies are skipped, as in load_data, and so are malformed rows,
+    missing a column or with extra ones.
+
+    The landmark index is rebuilt with the same number of landmarks,
+    since new credits can shorten distances and break its bounds and
+    new people have no distances in it, and the path cache is cleared.
+    Returns the number of people, movies and credits added, and of
+    malformed rows skipped.
+    """
+    global landmarks
+    given = (people_rows, movie_rows, star_rows)
+    malformed = 0
+    rows = []
+    for filename, file_rows in zip(CSV_FILES, given):
+        file_rows = list(file_rows)
+        kept = [row for row in file_rows if well_formed(row, filename)]
+        malformed += len(file_rows) - len(kept)
+        rows.append(kept)
+    people_rows, movie_rows, star_rows = rows
+
+    known = graph.person_index if graph is not None else people
+    new_people = {}
+    for row in people_rows:
+        if row["id"] not in known:
+            new_people.setdefault(row["id"], row)
+    new_people = list(new_people.values())
+
+    if graph is not None:
+        counts = graph.extend(people_rows, movie_rows, star_rows)
+    else:
+        counts = {"people": 0, "movies": 0, "stars": 0}
+        for row in new_people:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            counts["people"] += 1
+        for row in movie_rows:
+            if row["id"] in movies:
+                continue
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+            counts["movies"] += 1
+        for row in star_rows:
+            try:
+                person = people[row["person_id"]]
+                movie = movies[row["movie_id"]]
+            except KeyError:
+                continue
+            if row["movie_id"] not in person["movies"]:
+                person["movies"].add(row["movie_id"])
+                movie["stars"].add(row["person_id"])
+                counts["stars"] += 1
+
+    for row in new_people:
+        names.setdefault(normalize(row["name"]), set()).add(row["id"])
+        if name_index is not None:
+            name_index.add(row["name"])
+
+    if landmarks is not None and (counts["people"] or counts["stars"]):
+        landmarks = landmark_index.LandmarkIndex.build(
+            graph, len(landmarks.landmarks)
+        )
+    if path_cache is not None:
+        path_cache.clear()
+    counts["malformed"] = malformed
+    return counts
+
+
+def well_formed(row, filename):
+    """
+    Returns whether row, read from filename, has all of its columns
+    and no extra ones.
+    """
+    return None not in row and all(
+        row.get(column) is not None for column in COLUMNS[filename]
+    )
+
+
+def apply_delta(directory):
+    """
+    Applies a delta directory holding any of people.csv, movies.csv and
+    stars.csv, in the same schema as the dataset, with apply_rows.
+    """
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"no such delta directory: {directory}")
+    rows = []
+    for filename in CSV_FILES:
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            rows.append([])
+            continue
+        with open(path, encoding="utf-8") as f:
+            rows.append(list(csv.DictReader(f)))
+    return apply_rows(*rows)
+
+
+def ingest_appended(directory):
+    """
+    Applies the complete rows appended to the CSV files in directory
+    since they were loaded (or last successfully ingested) with
+    apply_rows.
+    """
+    sizes = loaded_sizes[directory]
+    rows = []
+    new_sizes = {}
+    for filename in CSV_FILES:
+        with open(os.path.join(directory, filename), "rb") as f:
+            header = f.readline().decode("utf-8")
+            f.seek(sizes[filename])
+            data = f.read()
+        # Leave a partly written last line for the next call
+        data = data[:data.rfind(b"\n") + 1]
+        new_sizes[filename] = sizes[filename] + len(data)
+        lines = [header] + data.decode("utf-8").splitlines(keepends=True)
+        rows.append(list(csv.DictReader(lines)))
+    counts = apply_rows(*rows)
+    # Only move past the rows once they are in, so a call that fails
+    # to read or apply them reads them again
+    sizes.update(new_sizes)
+    return counts
+
+
+def use_landmarks(directory, k=16):
+    """
+    Load, or build and save, a landmark index over the compact graph.
+    """
+    global landmarks
+    if graph is None:
+        raise ValueError("landmarks need the compact graph")
+    landmarks = landmark_index.load_or_build(graph, directory, k)
+
+
+def enable_cache(maxsize=1024):
+    """
+    Remember the results of the last maxsize searches.
+    """
+    global path_cache
+    path_cache = LRUCache(maxsize)
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find degrees of separation.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--search", choices=ALL_SEARCHES, default="bfs",
+                        help="search strategy used to find the path")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data into a compact CSR graph")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always parse the CSV files")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="use an index of K landmarks (needs --compact)")
+    parser.add_argument("--disambiguate", choices=DISAMBIGUATIONS,
+                        help="pick between people with the same name "
+                             "instead of asking")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="match names by prefix and allowing typos")
+    args = parser.parse_args()
+    if args.search not in SEARCHES and not args.compact:
+        parser.error(f"--search {args.search} needs --compact")
+    if args.landmarks and not args.compact:
+        parser.error("--landmarks needs --compact")
+    if args.search == "astar" and not args.landmarks:
+        parser.error("--search astar needs --landmarks")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, args.compact, args.cache, args.fuzzy)
+    if args.landmarks:
+        use_landmarks(args.directory, args.landmarks)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), args.disambiguate, args.fuzzy)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), args.disambiguate, args.fuzzy)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, args.search)
 
     if path is None:
         print("Not connected.")
@@ -79,19 +359,74 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_info(path[i][1])["name"]
+            person2 = person_info(path[i + 1][1])["name"]
+            movie = movie_info(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, search="bfs"):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     """
+    path, _ = find_path(source, target, search)
+    return path
+
+
+def find_path(source, target, search="bfs"):
+    """
+    Runs the `search` strategy from source to target and returns
+    a (path, num_explored) tuple, where path is as for shortest_path.
+    Results served from path_cache, and pairs the landmark index
+    shows to be disconnected, count as exploring no one.
+    """
+    if path_cache is None:
+        return _find_path(source, target, search)
+
+    key = (source, target, search)
+    cached = path_cache.get(key)
+    if cached is not None:
+        path = cached[0]
+        return (None if path is None else list(path)), 0
+    path, num_explored = _find_path(source, target, search)
+    path_cache.put(key, (None if path is None else tuple(path),))
+    return path, num_explored
+
+
+def _find_path(source, target, search):
+    if search not in ALL_SEARCHES:
+        raise ValueError(f"unknown search strategy: {search}")
+    if graph is None:
+        if search not in SEARCHES:
+            raise ValueError(f"{search} search needs the compact graph")
+        return SEARCHES[search](source, target)
+
+    source, target = graph.person_index[source], graph.person_index[target]
+    # The landmark bounds tell people in different components apart
+    # without searching
+    if landmarks is not None:
+        lower, _ = landmarks.bounds(source, target)
+        if lower is None:
+            return None, 0
+
+    # Run the graph's own version of the search on dense indices
+    path, num_explored = GRAPH_SEARCHES[search](graph, source, target)
+    if path is not None:
+        path = [
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path
+        ]
+    return path, num_explored
+
+
+def breadth_first_search(source, target):
+    """
+    One-sided BFS from source, expanding people until target is dequeued.
+    Returns a (path, num_explored) tuple.
+    """
     num_explored = 0
     initial = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
@@ -99,7 +434,7 @@ def shortest_path(source, target):
     explored = set()
     while True:
         if frontier.empty():
-            return None
+            return None, num_explored
         removed_node = frontier.remove()
         num_explored += 1
         if removed_node.state == target:
@@ -115,27 +450,130 @@ def shortest_path(source, target):
             for foo in range(len(actions)):
                 tmp = (actions[foo], cells[foo])
                 solution.append(tmp)
-            return solution
+            return solution, num_explored
 
         explored.add(removed_node.state)
         for action, state in neighbors_for_person(removed_node.state):
             if not frontier.contains_state(state) and state not in explored:
                 child = Node(state=state, parent=removed_node, action=action)
                 frontier.add(child)
-    raise NotImplementedError
 
-def person_id_for_name(name):
+
+def bidirectional_search(source, target):
+    """
+    BFS grown from both source and target at once, always expanding
+    a full level of the smaller frontier, until the two searches meet.
+    Returns a (path, num_explored) tuple.
+    """
+    if source == target:
+        return [], 0
+
+    # Maps each reached person to the (movie_id, person_id) edge
+    # leading back towards the side's root
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    num_explored = 0
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, visited, other = forward_frontier, forward, backward
+        else:
+            frontier, visited, other = backward_frontier, backward, forward
+
+        # Expand the whole level so the shortest meeting point is found
+        next_frontier = []
+        meeting = None
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in visited:
+                    continue
+                visited[neighbor] = (movie_id, person_id)
+                if neighbor in other:
+                    meeting = neighbor
+                    break
+                next_frontier.append(neighbor)
+            if meeting is not None:
+                break
+
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting), num_explored
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None, num_explored
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Builds the source-to-target path through `meeting` from the
+    parent maps of a bidirectional search.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, parent = backward[person_id]
+        path.append((movie_id, parent))
+        person_id = parent
+    return path
+
+
+SEARCHES = {
+    "bfs": breadth_first_search,
+    "bidirectional": bidirectional_search,
+}
+
+
+def landmark_search(graph, source, target):
+    """
+    A* search guided by the landmark index.
+    """
+    if landmarks is None:
+        raise ValueError("astar search needs a landmark index")
+    return landmarks.astar_search(source, target)
+
+
+# The same strategies run directly on the compact graph,
+# plus those that need it
+GRAPH_SEARCHES = {
+    "bfs": Graph.breadth_first_search,
+    "bidirectional": Graph.bidirectional_search,
+    "astar": landmark_search,
+}
+
+ALL_SEARCHES = list(GRAPH_SEARCHES)
+
+
+def person_id_for_name(name, policy=None, fuzzy=False):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Ambiguities are resolved by the given DISAMBIGUATIONS policy,
+    or by asking if there is none. If fuzzy, a name that matches
+    no one exactly is looked up by prefix and then allowing typos.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name, fuzzy)
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and policy is not None:
+        return choose_person(person_ids, policy)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_info(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -150,11 +588,55 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name, fuzzy=False):
+    """
+    Returns the sorted person_ids with the given name. If fuzzy and there
+    are none, returns those of the names name_index matches instead.
+    """
+    key = normalize(name)
+    if key in names or not fuzzy or name_index is None:
+        return sorted(names.get(key, set()))
+    return sorted(
+        person_id
+        for match in name_index.lookup(key)
+        for person_id in names.get(match, ())
+    )
+
+
+def choose_person(person_ids, policy):
+    """
+    Picks one of person_ids by a DISAMBIGUATIONS policy.
+    """
+    return min(person_ids, key=DISAMBIGUATIONS[policy])
+
+
+def _most_movies(person_id):
+    return -movie_count(person_id), person_id
+
+
+def _earliest_birth(person_id):
+    # People with no recorded birth year sort last
+    birth = person_info(person_id)["birth"]
+    return (0, int(birth), person_id) if birth else (1, 0, person_id)
+
+
+DISAMBIGUATIONS = {
+    "most-movies": _most_movies,
+    "earliest-birth": _earliest_birth,
+}
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return set(
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index[person_id])
+        )
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -163,5 +645,35 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_info(person_id):
+    """
+    Returns a dictionary with the name and birth of a person.
+    """
+    if graph is None:
+        return people[person_id]
+    i = graph.person_index[person_id]
+    return {"name": graph.person_names[i], "birth": graph.person_births[i]}
+
+
+def movie_count(person_id):
+    """
+    Returns the number of movies a person starred in.
+    """
+    if graph is None:
+        return len(people[person_id]["movies"])
+    i = graph.person_index[person_id]
+    return graph.person_offsets[i + 1] - graph.person_offsets[i]
+
+
+def movie_info(movie_id):
+    """
+    Returns a dictionary with the title and year of a movie.
+    """
+    if graph is None:
+        return movies[movie_id]
+    i = graph.movie_index[movie_id]
+    return {"title": graph.movie_titles[i], "year": graph.movie_years[i]}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,403 @@
+import csv
+from array import array
+
+# Typecodes for node indices and for offsets into the edge arrays
+INDEX = "i"
+OFFSET = "q"
+
+
+class Graph():
+    """
+    Compact person-movie bipartite graph.
+
+    People and movies are numbered densely from 0 in file order, and the
+    edges are stored CSR-style: the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]], and likewise
+    the stars of movie m are movie_people[movie_offsets[m]:...].
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: i for i, movie_id in enumerate(movie_ids)
+        }
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds the graph straight from the CSV files in directory,
+        without going through per-person and per-movie sets.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {p: i for i, p in enumerate(person_ids)}
+        movie_index = {m: i for i, m in enumerate(movie_ids)}
+        edge_people = array(INDEX)
+        edge_movies = array(INDEX)
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+
+        # Repeated credits are dropped once grouped by person, and the
+        # movie side is built from the deduplicated edges
+        person_offsets, person_movies = _csr(edge_people, edge_movies,
+                                             len(person_ids))
+        del edge_people, edge_movies
+        _dedup_csr(person_offsets, person_movies)
+        edge_people = array(INDEX)
+        for person in range(len(person_ids)):
+            count = person_offsets[person + 1] - person_offsets[person]
+            if count:
+                edge_people.extend(array(INDEX, [person]) * count)
+
+        return cls(
+            person_ids, person_names, person_births,
+            movie_ids, movie_titles, movie_years,
+            person_offsets, person_movies,
+            *_csr(person_movies, edge_people, len(movie_ids)),
+        )
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds the graph from the `people` and `movies` dictionaries
+        filled in by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {p: i for i, p in enumerate(person_ids)}
+        movie_index = {m: i for i, m in enumerate(movie_ids)}
+        edge_people = array(INDEX)
+        edge_movies = array(INDEX)
+        for person_id, person in people.items():
+            for movie_id in person["movies"]:
+                edge_people.append(person_index[person_id])
+                edge_movies.append(movie_index[movie_id])
+
+        return cls(
+            person_ids,
+            [people[p]["name"] for p in person_ids],
+            [people[p]["birth"] for p in person_ids],
+            movie_ids,
+            [movies[m]["title"] for m in movie_ids],
+            [movies[m]["year"] for m in movie_ids],
+            *_csr(edge_people, edge_movies, len(person_ids)),
+            *_csr(edge_movies, edge_people, len(movie_ids)),
+        )
+
+    def extend(self, people_rows=(), movie_rows=(), star_rows=()):
+        """
+        Adds people, movies and credits given as rows in the CSV schema,
+        ignoring ids already present and credits naming unknown ones.
+        The edge arrays are rebuilt with the new credits spliced in and
+        swapped in at once, so searches running meanwhile see either
+        the old graph or the new one.
+        Returns the number of people, movies and credits added.
+        """
+        columns = {
+            name: list(getattr(self, name)) for name in (
+                "person_ids", "person_names", "person_births",
+                "movie_ids", "movie_titles", "movie_years",
+            )
+        }
+        person_index = dict(self.person_index)
+        movie_index = dict(self.movie_index)
+
+        for row in people_rows:
+            if row["id"] in person_index:
+                continue
+            person_index[row["id"]] = len(columns["person_ids"])
+            columns["person_ids"].append(row["id"])
+            columns["person_names"].append(row["name"])
+            columns["person_births"].append(row["birth"])
+        for row in movie_rows:
+            if row["id"] in movie_index:
+                continue
+            movie_index[row["id"]] = len(columns["movie_ids"])
+            columns["movie_ids"].append(row["id"])
+            columns["movie_titles"].append(row["title"])
+            columns["movie_years"].append(row["year"])
+
+        # New movies of each person and new stars of each movie
+        added_movies = {}
+        added_people = {}
+        for row in star_rows:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            if self._has_edge(person, movie) \
+                    or movie in added_movies.get(person, ()):
+                continue
+            added_movies.setdefault(person, []).append(movie)
+            added_people.setdefault(movie, []).append(person)
+
+        num_people = len(columns["person_ids"])
+        num_movies = len(columns["movie_ids"])
+        person_offsets, person_movies = _merge_csr(
+            self.person_offsets, self.person_movies, added_movies, num_people
+        )
+        movie_offsets, movie_people = _merge_csr(
+            self.movie_offsets, self.movie_people, added_people, num_movies
+        )
+
+        counts = {
+            "people": num_people - self.num_people(),
+            "movies": num_movies - self.num_movies(),
+            "stars": sum(len(movies) for movies in added_movies.values()),
+        }
+        self.__dict__.update(
+            columns,
+            person_index=person_index,
+            movie_index=movie_index,
+            person_offsets=person_offsets,
+            person_movies=person_movies,
+            movie_offsets=movie_offsets,
+            movie_people=movie_people,
+        )
+        return counts
+
+    def _has_edge(self, person, movie):
+        if person + 1 >= len(self.person_offsets):
+            return False
+        start = self.person_offsets[person]
+        end = self.person_offsets[person + 1]
+        return movie in self.person_movies[start:end]
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with the given person.
+        """
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for i in range(self.person_offsets[person],
+                       self.person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[j]
+
+    def breadth_first_search(self, source, target):
+        """
+        One-sided BFS over person indices.
+        Returns a (path, num_explored) tuple, where path is a list of
+        (movie, person) index pairs or None if not connected.
+        """
+        if source == target:
+            return [], 1
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        # parent_person[p] is -1 until p is reached
+        parent_person = array(INDEX, [-1]) * self.num_people()
+        parent_movie = array(INDEX, [-1]) * self.num_people()
+        parent_person[source] = source
+        frontier = [source]
+        num_explored = 0
+
+        while frontier:
+            next_frontier = []
+            for person in frontier:
+                num_explored += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if parent_person[neighbor] != -1:
+                            continue
+                        parent_person[neighbor] = person
+                        parent_movie[neighbor] = movie
+                        if neighbor == target:
+                            return (
+                                _walk(parent_person, parent_movie,
+                                      source, target)[::-1],
+                                num_explored,
+                            )
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        return None, num_explored
+
+    def bidirectional_search(self, source, target):
+        """
+        BFS grown from both ends, expanding the smaller frontier a level
+        at a time until the two searches meet.
+        Returns a (path, num_explored) tuple as breadth_first_search.
+        """
+        if source == target:
+            return [], 0
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        # side[p] is 1 once reached from the source, 2 from the target
+        side = bytearray(self.num_people())
+        parent_person = array(INDEX, [-1]) * self.num_people()
+        parent_movie = array(INDEX, [-1]) * self.num_people()
+        side[source], side[target] = 1, 2
+        frontiers = {1: [source], 2: [target]}
+        num_explored = 0
+
+        while frontiers[1] and frontiers[2]:
+            current = 1 if len(frontiers[1]) <= len(frontiers[2]) else 2
+            next_frontier = []
+            for person in frontiers[current]:
+                num_explored += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if side[neighbor] == current:
+                            continue
+                        if side[neighbor]:
+                            # The searches meet on the edge person-neighbor
+                            if current == 1:
+                                near, far = person, neighbor
+                            else:
+                                near, far = neighbor, person
+                            path = _walk(parent_person, parent_movie,
+                                         source, near)[::-1]
+                            path.append((movie, far))
+                            while far != target:
+                                path.append((parent_movie[far],
+                                             parent_person[far]))
+                                far = parent_person[far]
+                            return path, num_explored
+                        side[neighbor] = current
+                        parent_person[neighbor] = person
+                        parent_movie[neighbor] = movie
+                        next_frontier.append(neighbor)
+            frontiers[current] = next_frontier
+
+        return None, num_explored
+
+
+def _walk(parent_person, parent_movie, root, person):
+    """
+    Follows parent links from person back to root, returning the
+    (movie, person) pairs visited from person towards root.
+    """
+    path = []
+    while person != root:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    return path
+
+
+def _csr(sources, destinations, n):
+    """
+    Groups the edges (sources[i], destinations[i]) by source.
+    Returns (offsets, targets) arrays in CSR layout for n sources.
+    """
+    offsets = array(OFFSET, [0]) * (n + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    targets = array(INDEX, [0]) * len(sources)
+    position = array(OFFSET, offsets[:n])
+    for source, destination in zip(sources, destinations):
+        targets[position[source]] = destination
+        position[source] += 1
+    return offsets, targets
+
+
+def _dedup_csr(offsets, targets):
+    """
+    Sorts the targets of each source and drops repeated ones,
+    compacting the CSR arrays in place.
+    """
+    end = 0
+    start = offsets[0]
+    for source in range(len(offsets) - 1):
+        stop = offsets[source + 1]
+        offsets[source] = end
+        previous = None
+        for target in sorted(targets[start:stop]):
+            if target != previous:
+                targets[end] = target
+                end += 1
+                previous = target
+        start = stop
+    offsets[-1] = end
+    del targets[end:]
+
+
+def _merge_csr(offsets, targets, additions, n):
+    """
+    Splices additions, a dictionary from source to a list of new
+    targets, into CSR arrays, growing them to n sources.
+    Returns new (offsets, targets) arrays.
+    """
+    old_n = len(offsets) - 1
+    new_offsets = array(OFFSET, [0]) * (n + 1)
+    new_targets = array(INDEX)
+    shift = 0
+    copied = 0
+    for source in sorted(additions):
+        # Copy the untouched run of sources up to and including this one
+        end = offsets[min(source + 1, old_n)]
+        new_targets.extend(targets[copied:end])
+        new_targets.extend(additions[source])
+        copied = end
+    new_targets.extend(targets[copied:offsets[old_n]])
+
+    for i in range(n):
+        if i < old_n:
+            count = offsets[i + 1] - offsets[i]
+        else:
+            count = 0
+        count += len(additions.get(i, ()))
+        shift += count
+        new_offsets[i + 1] = shift
+    return new_offsets, new_targets
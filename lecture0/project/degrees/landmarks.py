@@ -0,0 +1,240 @@
+import heapq
+import json
+import os
+import struct
+
+import snapshot
+
+FILENAME = "degrees.landmarks"
+MAGIC = b"DEGLMK\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+# Distance recorded for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a few well-connected landmark people to everyone,
+    giving lower and upper bounds on the distance between any two
+    people by the triangle inequality.
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        # distances[k][p] is the distance from landmarks[k] to person p
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks the k people with the most co-star links as landmarks
+        and runs a BFS from each.
+        """
+        landmarks = most_connected(graph, k)
+        return cls(graph, landmarks,
+                   [distances_from(graph, landmark) for landmark in landmarks])
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between person
+        indices source and target. upper is None if no landmark reaches
+        both, and both are None if they are known to be disconnected.
+        """
+        lower, upper = 0, None
+        for distances in self.distances:
+            s, t = distances[source], distances[target]
+            if s == UNREACHABLE and t == UNREACHABLE:
+                continue
+            if s == UNREACHABLE or t == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        return lower, upper
+
+    def heuristic(self, person, target):
+        """
+        Admissible estimate of the distance from person to target,
+        or None if they are in different components.
+        """
+        estimate = 0
+        for distances in self.distances:
+            p, t = distances[person], distances[target]
+            if p == UNREACHABLE and t == UNREACHABLE:
+                continue
+            if p == UNREACHABLE or t == UNREACHABLE:
+                return None
+            if abs(p - t) > estimate:
+                estimate = abs(p - t)
+        return estimate
+
+    def astar_search(self, source, target):
+        """
+        A* over person indices guided by the landmark heuristic.
+        Returns a (path, num_explored) tuple as Graph.breadth_first_search.
+        """
+        graph = self.graph
+        if source == target:
+            return [], 1
+        if self.heuristic(source, target) is None:
+            return None, 0
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+
+        best = {source: 0}
+        parents = {source: None}
+        closed = set()
+        # Ties on f are broken towards deeper nodes
+        queue = [(self.heuristic(source, target), 0, source)]
+        num_explored = 0
+
+        while queue:
+            _, negative_g, person = heapq.heappop(queue)
+            if person in closed:
+                continue
+            closed.add(person)
+            num_explored += 1
+            if person == target:
+                path = []
+                while parents[person] is not None:
+                    movie, parent = parents[person]
+                    path.append((movie, person))
+                    person = parent
+                path.reverse()
+                return path, num_explored
+
+            g = -negative_g + 1
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if neighbor in closed or best.get(neighbor, g + 1) <= g:
+                        continue
+                    h = self.heuristic(neighbor, target)
+                    if h is None:
+                        continue
+                    best[neighbor] = g
+                    parents[neighbor] = (movie, person)
+                    heapq.heappush(queue, (g + h, -g, neighbor))
+
+        return None, num_explored
+
+
+def most_connected(graph, k):
+    """
+    Returns the k person indices with the most co-star links,
+    counting a co-star once per shared movie.
+    """
+    def links(person):
+        return sum(
+            graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+            for movie in graph.person_movies[
+                graph.person_offsets[person]:graph.person_offsets[person + 1]
+            ]
+        )
+    return heapq.nlargest(k, range(graph.num_people()), key=links)
+
+
+def distances_from(graph, source):
+    """
+    Returns a bytearray of BFS distances from person index source,
+    UNREACHABLE for people in other components.
+    """
+    distances = bytearray([UNREACHABLE]) * graph.num_people()
+    seen_movies = bytearray(graph.num_movies())
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+
+    while frontier and depth + 1 < UNREACHABLE:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for i in range(graph.person_offsets[person],
+                           graph.person_offsets[person + 1]):
+                movie = graph.person_movies[i]
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for j in range(graph.movie_offsets[movie],
+                               graph.movie_offsets[movie + 1]):
+                    neighbor = graph.movie_people[j]
+                    if distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = depth
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+
+    return distances
+
+
+def path_for(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def save(index, directory):
+    """
+    Writes the index next to the dataset in directory.
+    """
+    metadata = json.dumps({
+        "sources": snapshot.source_stats(directory),
+        "landmarks": [index.graph.person_ids[p] for p in index.landmarks],
+    }).encode("utf-8")
+    path = path_for(directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+        f.write(metadata)
+        for distances in index.distances:
+            f.write(distances)
+    os.replace(tmp, path)
+
+
+def load(graph, directory):
+    """
+    Reads the index saved for directory, or returns None if there is
+    none or it is out of date with the CSV files.
+    """
+    try:
+        with open(path_for(directory), "rb") as f:
+            data = f.read()
+        magic, version, length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        start = HEADER.size + length
+        metadata = json.loads(data[HEADER.size:start])
+        if metadata["sources"] != snapshot.source_stats(directory):
+            return None
+        landmarks = [graph.person_index[p] for p in metadata["landmarks"]]
+    except (OSError, struct.error, ValueError, KeyError):
+        return None
+
+    n = graph.num_people()
+    if len(data) != start + n * len(landmarks):
+        return None
+    distances = [
+        bytearray(data[start + k * n:start + (k + 1) * n])
+        for k in range(len(landmarks))
+    ]
+    return LandmarkIndex(graph, landmarks, distances)
+
+
+def load_or_build(graph, directory, k=16):
+    """
+    Returns the saved index for directory if it has k landmarks,
+    building and saving a new one otherwise.
+    """
+    index = load(graph, directory)
+    if index is not None and len(index.landmarks) == k:
+        return index
+    index = LandmarkIndex.build(graph, k)
+    try:
+        save(index, directory)
+    except OSError:
+        pass
+    return index
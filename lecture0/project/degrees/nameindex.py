@@ -0,0 +1,159 @@
+from array import array
+from bisect import bisect_left, insort
+
+
+def normalize(name):
+    """
+    Lowercases a name and collapses runs of whitespace.
+    """
+    return " ".join(name.lower().split())
+
+
+def trigrams(name):
+    """
+    Returns the set of character trigrams of a name, padded so that
+    the first and last letters get trigrams of their own.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b,
+    or limit + 1 as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant lookup over a set of names.
+
+    Names are kept sorted for prefix search by bisection, and each
+    trigram, and each length, maps to the names with it for fuzzy search.
+    """
+
+    def __init__(self, names=()):
+        self.keys = []
+        self.key_index = {}
+        self.postings = {}
+        self.lengths = {}
+        for name in names:
+            self._add(normalize(name))
+        self.sorted_keys = sorted(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        return normalize(name) in self.key_index
+
+    def add(self, name):
+        """
+        Adds a name to the index if it is not already there.
+        """
+        key = normalize(name)
+        if self._add(key):
+            insort(self.sorted_keys, key)
+
+    def _add(self, key):
+        """
+        Adds a normalized name to all but sorted_keys.
+        Returns False if it was already there.
+        """
+        if key in self.key_index:
+            return False
+        i = len(self.keys)
+        self.keys.append(key)
+        self.key_index[key] = i
+        for trigram in trigrams(key):
+            if trigram not in self.postings:
+                self.postings[trigram] = array("i")
+            self.postings[trigram].append(i)
+        if len(key) not in self.lengths:
+            self.lengths[len(key)] = array("i")
+        self.lengths[len(key)].append(i)
+        return True
+
+    def prefix(self, query, limit=10):
+        """
+        Returns up to limit names starting with query, in sorted order.
+        """
+        query = normalize(query)
+        matches = []
+        i = bisect_left(self.sorted_keys, query)
+        while i < len(self.sorted_keys) and len(matches) < limit:
+            key = self.sorted_keys[i]
+            if not key.startswith(query):
+                break
+            matches.append(key)
+            i += 1
+        return matches
+
+    def fuzzy(self, query, max_distance=2, limit=10):
+        """
+        Returns up to limit (distance, name) pairs for names within
+        max_distance edits of query, closest first.
+        """
+        query = normalize(query)
+        grams = trigrams(query)
+        low, high = len(query) - max_distance, len(query) + max_distance
+
+        # An edit changes at most three trigrams, so any match shares
+        # at least need of the query trigrams, and so at least one of
+        # the 3 * max_distance + 1 rarest
+        need = len(grams) - 3 * max_distance
+        if need > 0:
+            rarest = sorted(grams, key=lambda g: len(self.postings.get(g, ())))
+            candidates = set()
+            for gram in rarest[:3 * max_distance + 1]:
+                candidates.update(self.postings.get(gram, ()))
+            candidates = [
+                i for i in candidates
+                if low <= len(self.keys[i]) <= high
+                and len(grams & trigrams(self.keys[i])) >= need
+            ]
+        else:
+            # Too short for the filter to work, so check every name
+            # of a plausible length instead
+            candidates = [
+                i for length in range(max(low, 0), high + 1)
+                for i in self.lengths.get(length, ())
+            ]
+
+        matches = []
+        for i in candidates:
+            key = self.keys[i]
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, key))
+        matches.sort()
+        return matches[:limit]
+
+    def lookup(self, query, max_distance=2, limit=10):
+        """
+        Returns the names best matching query: the exact name if indexed,
+        else names it is a prefix of, else names within max_distance edits.
+        """
+        key = normalize(query)
+        if key in self.key_index:
+            return [key]
+        matches = self.prefix(key, limit)
+        if matches:
+            return matches
+        return [name for _, name in self.fuzzy(key, max_distance, limit)]
@@ -0,0 +1,312 @@
+import argparse
+import json
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+# Held while answering a query or applying updates, so that queries
+# never see the data half updated
+lock = threading.Lock()
+
+
+def resolve(person, policy=None, fuzzy=False):
+    """
+    Returns the person_id for a person id or name, raising LookupError
+    if it is unknown, or ambiguous and there is no policy to pick one.
+    """
+    if person in degrees.people or (
+            degrees.graph is not None and person in degrees.graph.person_index):
+        return person
+    person_ids = degrees.person_ids_for_name(person, fuzzy)
+    if len(person_ids) == 0:
+        raise LookupError(f"person not found: {person}")
+    if len(person_ids) > 1:
+        if policy is not None:
+            return degrees.choose_person(person_ids, policy)
+        raise LookupError(f"ambiguous name: {person}, one of {person_ids}")
+    return person_ids[0]
+
+
+def query(source, target, search="bfs", policy=None, fuzzy=False):
+    """
+    Answers one source/target query.
+    Returns a JSON-serialisable dictionary with the path, the number
+    of people explored and the latency in milliseconds.
+    """
+    start = time.perf_counter()
+    result = {"source": source, "target": target}
+    try:
+        with lock:
+            path, num_explored = degrees.find_path(
+                resolve(source, policy, fuzzy), resolve(target, policy, fuzzy),
+                search
+            )
+    except LookupError as e:
+        result["error"] = str(e)
+        path, num_explored = None, 0
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    result["explored"] = num_explored
+    result["ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def ingest(directory, delta=None):
+    """
+    Applies the rows appended to the dataset in directory since it was
+    loaded, or the delta directory if given.
+    Returns the counts of what was added, and of malformed rows skipped.
+    """
+    with lock:
+        if delta is not None:
+            return degrees.apply_delta(delta)
+        return degrees.ingest_appended(directory)
+
+
+def follow(directory, interval):
+    """
+    Starts a daemon thread ingesting rows appended to the dataset
+    every interval seconds.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                counts = ingest(directory)
+            except Exception as e:
+                # Keep following; the same rows are tried again next time
+                print(json.dumps({"error": f"ingest failed: {e}"}),
+                      file=sys.stderr)
+                continue
+            if any(counts.values()):
+                print(json.dumps({"ingested": counts}), file=sys.stderr)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def cache_stats():
+    """
+    Returns the hit and miss counts of the path cache.
+    """
+    cache = degrees.path_cache
+    if cache is None:
+        return {"cache": None}
+    return {
+        "cache": {
+            "size": len(cache),
+            "maxsize": cache.maxsize,
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "hit_rate": round(cache.hit_rate(), 4),
+        }
+    }
+
+
+def parse_pair(line):
+    """
+    Parses a query line, either a JSON object with source and target
+    keys or the two separated by a tab. Integer ids in JSON are taken
+    as strings; other values raise ValueError.
+    Returns None for a blank line.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        pair = json.loads(line)
+        people = []
+        for key in ("source", "target"):
+            person = pair[key]
+            if isinstance(person, int) and not isinstance(person, bool):
+                person = str(person)
+            if not isinstance(person, str):
+                raise ValueError(f"{key} must be a string: {person!r}")
+            people.append(person)
+        return tuple(people)
+    source, target = line.split("\t")
+    return source.strip(), target.strip()
+
+
+def serve_lines(lines, out, **options):
+    """
+    Answers a query per line, writing a JSON line for each.
+    options are passed on to query. A query that fails gets an error
+    line rather than ending the stream.
+    """
+    for line in lines:
+        try:
+            pair = parse_pair(line)
+        except (ValueError, KeyError):
+            answer = {"error": f"bad query: {line.strip()}"}
+        else:
+            if pair is None:
+                continue
+            try:
+                answer = query(*pair, **options)
+            except Exception as e:
+                answer = {"source": pair[0], "target": pair[1],
+                          "error": f"query failed: {e}"}
+        out.write(json.dumps(answer))
+        out.write("\n")
+        out.flush()
+
+
+def serve_http(host, port, directory, **options):
+    """
+    Serves GET /path?source=...&target=... with a JSON answer,
+    and the path cache counters on GET /stats. POST /ingest applies
+    rows appended to the dataset, or POST /ingest?delta=DIR a delta.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if url.path != "/ingest":
+                self.send_error(404, "use /ingest")
+                return
+            delta = params["delta"][0] if "delta" in params else None
+            try:
+                answer = {"ingested": ingest(directory, delta)}
+            except (OSError, ValueError) as e:
+                self.send_error(400, str(e))
+                return
+            self.send_json(answer)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if url.path == "/stats":
+                answer = cache_stats()
+            elif url.path == "/path" and "source" in params \
+                    and "target" in params:
+                source, target = params["source"][0], params["target"][0]
+                try:
+                    answer = query(source, target, **options)
+                except Exception as e:
+                    self.send_json({"source": source, "target": target,
+                                    "error": f"query failed: {e}"}, 500)
+                    return
+            else:
+                self.send_error(404, "use /path?source=...&target=...")
+                return
+            self.send_json(answer)
+
+        def send_json(self, answer, status=200):
+            body = json.dumps(answer).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    with ThreadingHTTPServer((host, port), Handler) as server:
+        print(f"Serving on http://{host}:{port}/path", file=sys.stderr)
+        server.serve_forever()
+
+
+def serve_unix(path, **options):
+    """
+    Serves the line protocol of serve_lines on a Unix socket,
+    one client per connection.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (line.decode("utf-8") for line in self.rfile)
+            out = _SocketWriter(self.wfile)
+            serve_lines(lines, out, **options)
+
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Serving on {path}", file=sys.stderr)
+        server.serve_forever()
+
+
+class _SocketWriter():
+    """
+    Text writer over a binary socket file, for serve_lines.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, s):
+        self.wfile.write(s.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries from one load."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--search", choices=degrees.ALL_SEARCHES,
+                        default="bfs")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                        help="use an index of K landmarks (needs --compact)")
+    parser.add_argument("--cache-size", type=int, default=0, metavar="N",
+                        help="remember the results of the last N queries")
+    parser.add_argument("--disambiguate", choices=degrees.DISAMBIGUATIONS,
+                        help="pick between people with the same name "
+                             "instead of reporting an error")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="match names by prefix and allowing typos")
+    parser.add_argument("--follow", type=float, metavar="SECONDS",
+                        help="ingest rows appended to the CSV files "
+                             "every SECONDS")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--file", help="read queries from a file")
+    source.add_argument("--http", type=int, metavar="PORT",
+                        help="serve queries over HTTP on localhost")
+    source.add_argument("--unix", metavar="PATH",
+                        help="serve queries on a Unix socket")
+    args = parser.parse_args()
+    if args.search not in degrees.SEARCHES and not args.compact:
+        parser.error(f"--search {args.search} needs --compact")
+    if args.landmarks and not args.compact:
+        parser.error("--landmarks needs --compact")
+    if args.search == "astar" and not args.landmarks:
+        parser.error("--search astar needs --landmarks")
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, args.compact, args.cache, args.fuzzy)
+    if args.landmarks:
+        degrees.use_landmarks(args.directory, args.landmarks)
+    if args.cache_size:
+        degrees.enable_cache(args.cache_size)
+    print("Data loaded.", file=sys.stderr)
+
+    options = {
+        "search": args.search,
+        "policy": args.disambiguate,
+        "fuzzy": args.fuzzy,
+    }
+    if args.follow:
+        follow(args.directory, args.follow)
+    if args.http is not None:
+        serve_http("127.0.0.1", args.http, args.directory, **options)
+    elif args.unix is not None:
+        serve_unix(args.unix, **options)
+    elif args.file is not None:
+        with open(args.file, encoding="utf-8") as f:
+            serve_lines(f, sys.stdout, **options)
+    else:
+        serve_lines(sys.stdin, sys.stdout, **options)
+
+    if degrees.path_cache is not None:
+        print(json.dumps(cache_stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph, INDEX, OFFSET
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Header is the magic, the format version and the length of the
+# JSON metadata that follows it
+HEADER = struct.Struct("<8sII")
+
+ARRAYS = (
+    ("person_offsets", OFFSET),
+    ("person_movies", INDEX),
+    ("movie_offsets", OFFSET),
+    ("movie_people", INDEX),
+)
+STRINGS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+)
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob
+    plus an array of offsets into it, decoded on access.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return str(self.blob[start:end], "utf-8")
+
+    def __iter__(self):
+        offsets, blob = self.offsets, self.blob
+        for i in range(len(offsets) - 1):
+            yield str(blob[offsets[i]:offsets[i + 1]], "utf-8")
+
+
+def path_for(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stats(directory):
+    """
+    Returns the size and modification time of each CSV file,
+    which the snapshot records to tell when it is stale.
+    """
+    stats = {}
+    for name in SOURCES:
+        st = os.stat(os.path.join(directory, name))
+        stats[name] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def save(graph, directory, sources=None):
+    """
+    Writes graph to a snapshot file in directory, replacing any
+    existing one atomically. `sources` are the CSV stats the graph
+    was read from, by default their current ones.
+    """
+    if sources is None:
+        sources = source_stats(directory)
+    sections = [
+        (name, array(typecode, getattr(graph, name)).tobytes())
+        for name, typecode in ARRAYS
+    ]
+    for name in STRINGS:
+        encoded = [s.encode("utf-8") for s in getattr(graph, name)]
+        offsets = array(OFFSET, [0])
+        for s in encoded:
+            offsets.append(offsets[-1] + len(s))
+        sections.append((f"{name}.offsets", offsets.tobytes()))
+        sections.append((f"{name}.blob", b"".join(encoded)))
+
+    # Lay out every section on an 8-byte boundary after the header
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, len(data)]
+        position += _padded(len(data))
+    metadata = json.dumps({
+        "sources": sources,
+        "sections": layout,
+    }).encode("utf-8")
+    start = _padded(HEADER.size + len(metadata))
+
+    path = path_for(directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+        f.write(metadata)
+        f.write(bytes(start - HEADER.size - len(metadata)))
+        for name, data in sections:
+            f.write(data)
+            f.write(bytes(_padded(len(data)) - len(data)))
+    os.replace(tmp, path)
+
+
+def load(directory):
+    """
+    Memory-maps the snapshot in directory and returns it as a Graph.
+    Returns None if there is no snapshot, or if it was written by
+    another format version or from different CSV files.
+    """
+    try:
+        with open(path_for(directory), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        metadata = json.loads(bytes(data[HEADER.size:HEADER.size + length]))
+        if metadata["sources"] != source_stats(directory):
+            return None
+    except (struct.error, ValueError, KeyError, OSError):
+        return None
+
+    start = _padded(HEADER.size + length)
+    view = memoryview(data)
+
+    def section(name):
+        offset, size = metadata["sections"][name]
+        return view[start + offset:start + offset + size]
+
+    fields = {}
+    for name, typecode in ARRAYS:
+        fields[name] = section(name).cast(typecode)
+    for name in STRINGS:
+        fields[name] = StringTable(
+            section(f"{name}.offsets").cast(OFFSET),
+            section(f"{name}.blob"),
+        )
+    return Graph(**fields)
+
+
+def load_or_build(directory):
+    """
+    Returns the graph for directory from its snapshot, building it
+    from the CSV files and writing a new snapshot if needed.
+    """
+    graph = load(directory)
+    if graph is not None:
+        return graph
+    sources = source_stats(directory)
+    graph = Graph.from_csv(directory)
+    try:
+        save(graph, directory, sources)
+    except OSError:
+        # A read-only dataset still loads, just without the cache
+        pass
+    return graph
+
+
+def _padded(n):
+    return (n + 7) & ~7
@@ -0,0 +1,158 @@
+import argparse
+import csv
+import multiprocessing
+import random
+import sys
+
+import snapshot
+
+# Graph used by the pool workers, memory-mapped from the snapshot so
+# that every process shares the same read-only pages
+_graph = None
+
+
+def level_sweep(graph, source):
+    """
+    Runs a BFS from person index source over the whole component.
+    Returns a list whose d-th entry is the number of people at
+    distance d from source (entry 0 is source itself).
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    seen_people = bytearray(graph.num_people())
+    seen_movies = bytearray(graph.num_movies())
+    seen_people[source] = 1
+    frontier = [source]
+    histogram = []
+
+    while frontier:
+        histogram.append(len(frontier))
+        next_frontier = []
+        for person in frontier:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                # Each cast only needs scanning once per sweep
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if not seen_people[neighbor]:
+                        seen_people[neighbor] = 1
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+
+    return histogram
+
+
+def summarize(histogram):
+    """
+    Returns the eccentricity, number of people reached at distance
+    one or more, and the mean distance to them for a histogram.
+    """
+    reached = sum(histogram[1:])
+    total = sum(d * count for d, count in enumerate(histogram))
+    return {
+        "eccentricity": len(histogram) - 1,
+        "reached": reached,
+        "mean": total / reached if reached else 0.0,
+    }
+
+
+def merge(histograms):
+    """
+    Adds up histograms level by level.
+    """
+    merged = []
+    for histogram in histograms:
+        for d, count in enumerate(histogram):
+            if d == len(merged):
+                merged.append(0)
+            merged[d] += count
+    return merged
+
+
+def _init_worker(directory):
+    global _graph
+    _graph = snapshot.load_or_build(directory)
+
+
+def _sweep(source):
+    return source, level_sweep(_graph, source)
+
+
+def sweep_all(directory, sources, processes=None):
+    """
+    Runs level_sweep from each person index in sources over a
+    process pool. Returns a dictionary from source to histogram.
+    """
+    # Build or refresh the snapshot once before the workers map it
+    snapshot.load_or_build(directory)
+    with multiprocessing.Pool(processes, _init_worker, (directory,)) as pool:
+        return dict(pool.imap_unordered(_sweep, sources, chunksize=4))
+
+
+def write_csv(path, graph, histograms):
+    """
+    Writes one (person_id, distance, count) row per level of each
+    histogram, with the merged histogram under person_id "*".
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "distance", "count"])
+        for source, histogram in sorted(histograms.items()):
+            for d, count in enumerate(histogram):
+                writer.writerow([graph.person_ids[source], d, count])
+        for d, count in enumerate(merge(histograms.values())):
+            writer.writerow(["*", d, count])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Degrees of separation statistics."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--person", action="append", default=[],
+                        help="person id to sweep from (repeatable)")
+    parser.add_argument("--sample", type=int, default=0,
+                        help="also sweep from this many random people")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", help="CSV file for the histograms")
+    args = parser.parse_args()
+
+    graph = snapshot.load_or_build(args.directory)
+    try:
+        sources = [graph.person_index[p] for p in args.person]
+    except KeyError as e:
+        sys.exit(f"Person not found: {e.args[0]}")
+    if args.sample:
+        rng = random.Random(args.seed)
+        sources += rng.sample(range(graph.num_people()),
+                              min(args.sample, graph.num_people()))
+    if not sources:
+        sys.exit("Nothing to do: give --person or --sample.")
+
+    histograms = sweep_all(args.directory, sorted(set(sources)),
+                           args.processes)
+
+    for source, histogram in sorted(histograms.items()):
+        summary = summarize(histogram)
+        print(f"{graph.person_names[source]} ({graph.person_ids[source]}): "
+              f"eccentricity {summary['eccentricity']}, "
+              f"reached {summary['reached']}, "
+              f"mean distance {summary['mean']:.3f}")
+    overall = summarize(merge(histograms.values()))
+    print(f"Over {len(histograms)} sources: "
+          f"mean distance {overall['mean']:.3f} "
+          f"across {overall['reached']} connected pairs")
+
+    if args.output:
+        write_csv(args.output, graph, histograms)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
+from collections import OrderedDict, deque
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -6,14 +11,21 @@ class Node():
 
 
 class StackFrontier():
+    """
+    LIFO frontier backed by a deque, with a count of the states
+    currently in it so that contains_state is constant time.
+    """
+
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,17 +34,61 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self._pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
             return node
 
+    def _pop(self):
+        return self.frontier.pop()
+
 
 class QueueFrontier(StackFrontier):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class LRUCache():
+    """
+    Bounded mapping that evicts the least recently used entry,
+    counting hits and misses.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
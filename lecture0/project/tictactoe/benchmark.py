@@ -0,0 +1,59 @@
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def count_games(board):
+    """
+    Walks the full game tree with the nested-list engine.
+    Returns the number of finished games.
+    """
+    if ttt.terminal(board):
+        return 1
+    return sum(count_games(ttt.result(board, action))
+               for action in ttt.actions(board))
+
+
+def count_games_bitboard(x, o):
+    """
+    Walks the full game tree on bitboards.
+    Returns the number of finished games.
+    """
+    if bitboard.score(x, o) is not None:
+        return 1
+    return sum(count_games_bitboard(*bitboard.play(x, o, cell))
+               for cell in bitboard.empty_cells(x, o))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    games, list_seconds = timed(count_games, ttt.initial_state())
+    bit_games, bit_seconds = timed(count_games_bitboard, 0, 0)
+    assert games == bit_games
+    print(f"Full tree ({games} games):")
+    print(f"  nested lists: {list_seconds:8.3f}s")
+    print(f"     bitboards: {bit_seconds:8.3f}s "
+          f"({list_seconds / bit_seconds:.1f}x)")
+
+    # Turn off the opening book so that minimax really searches
+    saved_book, ttt.book = ttt.book, False
+    ttt.table.clear()
+    _, list_seconds = timed(ttt.minimax, ttt.initial_state())
+    ttt.book = saved_book
+    bitboard.solutions.clear()
+    _, bit_seconds = timed(bitboard.solve, 0, 0)
+    print("Solve from the empty board, cold caches:")
+    print(f"  nested lists: {list_seconds * 1000:8.3f}ms "
+          f"({len(ttt.table.entries)} positions)")
+    print(f"     bitboards: {bit_seconds * 1000:8.3f}ms "
+          f"({len(bitboard.solutions)} positions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A position is a pair of 9-bit masks (x, o) of the cells each player
+holds, with cell (i, j) at bit 3 * i + j. The functions at the bottom
+adapt this to the nested-list interface of tictactoe.py, so either
+module can drive runner.py.
+"""
+
+import tictactoe as ttt
+
+X = ttt.X
+O = ttt.O
+EMPTY = ttt.EMPTY
+
+FULL = 0b111111111
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# IS_WIN[mask] is 1 if the cells in mask contain a line
+IS_WIN = bytes(
+    any(mask & win == win for win in WIN_MASKS) for mask in range(FULL + 1)
+)
+
+# Cached (value, cell) of every position solved so far
+solutions = {}
+
+
+def encode(board):
+    """
+    Returns the (x, o) masks of a nested-list board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the nested-list board of the (x, o) masks.
+    """
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+         for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def x_to_move(x, o):
+    return x.bit_count() == o.bit_count()
+
+
+def empty_cells(x, o):
+    """
+    Yields the empty cells, lowest bit first.
+    """
+    empty = FULL & ~(x | o)
+    while empty:
+        low = empty & -empty
+        yield low.bit_length() - 1
+        empty ^= low
+
+
+def play(x, o, cell):
+    """
+    Returns the masks after the player to move takes cell.
+    """
+    if x_to_move(x, o):
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def score(x, o):
+    """
+    Returns 1 if X has a line, -1 if O has, 0 for a draw,
+    or None if the game is not over.
+    """
+    if IS_WIN[x]:
+        return 1
+    if IS_WIN[o]:
+        return -1
+    if x | o == FULL:
+        return 0
+    return None
+
+
+def solve(x, o):
+    """
+    Returns (value, cell) for the position under perfect play,
+    value being from X's point of view and cell None at the end.
+    """
+    key = (x, o)
+    if key in solutions:
+        return solutions[key]
+    value = score(x, o)
+    if value is not None:
+        return value, None
+
+    maximizing = x_to_move(x, o)
+    best_value, best_cell = None, None
+    for cell in empty_cells(x, o):
+        if maximizing:
+            v, _ = solve(x | 1 << cell, o)
+        else:
+            v, _ = solve(x, o | 1 << cell)
+        if best_value is None or (v > best_value if maximizing
+                                  else v < best_value):
+            best_value, best_cell = v, cell
+            # Nothing beats a win
+            if best_value == (1 if maximizing else -1):
+                break
+
+    solutions[key] = best_value, best_cell
+    return best_value, best_cell
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return ttt.initial_state()
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if x_to_move(*encode(board)) else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {(cell // 3, cell % 3) for cell in empty_cells(*encode(board))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = encode(board)
+    return decode(*play(x, o, 3 * action[0] + action[1]))
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = encode(board)
+    if IS_WIN[x]:
+        return X
+    if IS_WIN[o]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return score(*encode(board)) is not None
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return score(*encode(board))
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    _, cell = solve(*encode(board))
+    if cell is None:
+        return None
+    return cell // 3, cell % 3
@@ -0,0 +1,326 @@
+"""
+Tic Tac Toe Player for m,n,k-games
+
+Boards have m rows and n columns, and the first player to get k in a
+row (across, down or diagonally) wins. The search is alpha-beta with
+iterative deepening under an optional time budget, falling back to a
+heuristic evaluation at the depth cutoff, so it can return a good move
+on boards too large to solve.
+"""
+
+import time
+
+import tictactoe as ttt
+
+X = ttt.X
+O = ttt.O
+EMPTY = ttt.EMPTY
+
+# Search score of a win; wins sooner score higher
+WIN_SCORE = 10 ** 9
+
+# Transposition table entry bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Timeout(Exception):
+    """
+    Raised inside the search when its time budget runs out
+    or it is asked to stop.
+    """
+
+
+class Game():
+    """
+    The m,n,k-game, with the same interface as tictactoe.py.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise ValueError(f"no room for {k} in a row on {m}x{n}")
+        self.m = m
+        self.n = n
+        self.k = k
+
+        # Every window of k cells in a line, as flat cell indices,
+        # and the windows each cell belongs to
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(tuple(
+                            (i + di * s) * n + j + dj * s for s in range(k)
+                        ))
+        self.lines_through = [[] for _ in range(m * n)]
+        for line in self.lines:
+            for cell in line:
+                self.lines_through[cell].append(line)
+
+        # Cells in more windows are tried first
+        self.order = sorted(range(m * n),
+                            key=lambda cell: -len(self.lines_through[cell]))
+        self.table = {}
+        self.nodes = 0
+        self.deadline = None
+        self.stop = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        cells = [cell for row in board for cell in row]
+        return O if cells.count(X) > cells.count(O) else X
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i in range(self.m) for j in range(self.n)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        result = [row[:] for row in board]
+        result[action[0]][action[1]] = self.player(board)
+        return result
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for line in self.lines:
+            first = cells[line[0]]
+            if first != EMPTY and all(cells[c] == first for c in line):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or not any(
+            EMPTY in row for row in board
+        )
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        if self.terminal(board):
+            return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board, budget=None, max_depth=None, stop=None):
+        """
+        Returns the best action found for the current player on the board,
+        searching for at most budget seconds if given.
+        """
+        return self.search(board, budget, max_depth, stop)["action"]
+
+    def search(self, board, budget=None, max_depth=None, stop=None):
+        """
+        Searches the board by iterative deepening until the game is solved,
+        max_depth is reached, budget seconds have passed or the stop
+        event (a threading.Event) is set.
+        Returns a dictionary with the best action, its value from the
+        current player's point of view, the deepest completed depth
+        and the number of nodes searched.
+        """
+        if self.terminal(board):
+            return {"action": None, "value": None, "depth": 0, "nodes": 0}
+
+        cells = [cell for row in board for cell in row]
+        color = 1 if self.player(board) == X else -1
+        empties = cells.count(EMPTY)
+        if max_depth is None or max_depth > empties:
+            max_depth = empties
+        self.table = {}
+        self.nodes = 0
+        self.deadline = None if budget is None else time.perf_counter() + budget
+        self.stop = stop
+
+        # Until the first iteration finishes, fall back on move order
+        best = {
+            "action": None,
+            "value": None,
+            "depth": 0,
+        }
+        fallback = next(c for c in self.order if cells[c] == EMPTY)
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self._negamax(cells, depth, -WIN_SCORE - 1,
+                                            WIN_SCORE + 1, color, 0, None)
+            except Timeout:
+                break
+            best = {"action": divmod(move, self.n), "value": value,
+                    "depth": depth}
+            # A forced result cannot change with more depth
+            if abs(value) > WIN_SCORE - self.m * self.n:
+                break
+
+        if best["action"] is None:
+            best["action"] = divmod(fallback, self.n)
+        best["nodes"] = self.nodes
+        return best
+
+    def evaluate(self, cells):
+        """
+        Heuristic value of a position for X: every window still open to
+        only one player counts 10 ** (its pieces) for that player.
+        """
+        score = 0
+        for line in self.lines:
+            xs = os = 0
+            for c in line:
+                if cells[c] == X:
+                    xs += 1
+                elif cells[c] == O:
+                    os += 1
+            if xs and not os:
+                score += 10 ** xs
+            elif os and not xs:
+                score -= 10 ** os
+        return score
+
+    def _wins_through(self, cells, cell):
+        piece = cells[cell]
+        for line in self.lines_through[cell]:
+            if all(cells[c] == piece for c in line):
+                return True
+        return False
+
+    def _negamax(self, cells, depth, alpha, beta, color, ply, last):
+        """
+        Returns (value, move) for the side to move, color 1 for X and
+        -1 for O, with cells changed in place and restored after.
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and (
+                self.deadline is not None
+                and time.perf_counter() > self.deadline
+                or self.stop is not None and self.stop.is_set()):
+            raise Timeout()
+
+        # Only the last move can have completed a line
+        if last is not None and self._wins_through(cells, last):
+            return -(WIN_SCORE - ply), None
+        if EMPTY not in cells:
+            return 0, None
+        if depth == 0:
+            return color * self.evaluate(cells), None
+
+        key = tuple(cells)
+        entry = self.table.get(key)
+        hint = None
+        if entry is not None:
+            entry_depth, bound, value, hint = entry
+            value = _from_table(value, ply)
+            if entry_depth >= depth and (
+                    bound == EXACT
+                    or bound == LOWER and value >= beta
+                    or bound == UPPER and value <= alpha):
+                return value, hint
+
+        original_alpha = alpha
+        piece = X if color == 1 else O
+        best_value, best_move = -WIN_SCORE - 1, None
+        moves = [c for c in self.order if cells[c] == EMPTY]
+        if hint is not None:
+            moves.remove(hint)
+            moves.insert(0, hint)
+
+        for move in moves:
+            cells[move] = piece
+            value, _ = self._negamax(cells, depth - 1, -beta, -alpha,
+                                     -color, ply + 1, move)
+            value = -value
+            cells[move] = EMPTY
+            if value > best_value:
+                best_value, best_move = value, move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, bound, _to_table(best_value, ply), best_move)
+        return best_value, best_move
+
+
+def _to_table(value, ply):
+    # Wins are stored as distance from this position, not the root
+    if value > WIN_SCORE - 1000:
+        return value + ply
+    if value < -WIN_SCORE + 1000:
+        return value - ply
+    return value
+
+
+def _from_table(value, ply):
+    if value > WIN_SCORE - 1000:
+        return value - ply
+    if value < -WIN_SCORE + 1000:
+        return value + ply
+    return value
+
+
+# Game played by the module-level functions below
+game = Game()
+
+
+def configure(m=3, n=3, k=3):
+    """
+    Sets the board size and line length of the module-level game.
+    """
+    global game
+    game = Game(m, n, k)
+
+
+def initial_state():
+    return game.initial_state()
+
+
+def player(board):
+    return game.player(board)
+
+
+def actions(board):
+    return game.actions(board)
+
+
+def result(board, action):
+    return game.result(board, action)
+
+
+def winner(board):
+    return game.winner(board)
+
+
+def terminal(board):
+    return game.terminal(board)
+
+
+def utility(board):
+    return game.utility(board)
+
+
+def minimax(board, budget=None, max_depth=None, stop=None):
+    return game.minimax(board, budget, max_depth, stop)
@@ -1,12 +1,27 @@
+import argparse
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import mnk
 import tictactoe as ttt
-#import test as ttt
+#import bitboard as ttt
+
+parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe.")
+parser.add_argument("--think", type=float, default=1.0, metavar="SECONDS",
+                    help="time the computer may think on larger boards")
+parser.add_argument("--board", type=int, nargs=3, metavar=("M", "N", "K"),
+                    help="play k in a row on an m x n board")
+args = parser.parse_args()
+if args.board is not None:
+    mnk.configure(*args.board)
+    ttt = mnk
 
 pygame.init()
 size = width, height = 600, 400
+clock = pygame.time.Clock()
 
 # Colors
 black = (0, 0, 0)
@@ -16,16 +31,53 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
-user = None
 board = ttt.initial_state()
-ai_turn = False
+rows, cols = len(board), len(board[0])
+tile_size = min(80, (height - 120) // rows, (width - 40) // cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+# The computer thinks on a worker thread, so the window keeps redrawing;
+# ai_future holds its move once done and ai_stop cancels it
+executor = ThreadPoolExecutor(max_workers=1)
+ai_future = None
+ai_stop = None
+ai_started = 0
+
+# Shortest time "Computer thinking..." is shown for
+MIN_THINK = 0.5
+
+user = None
+
+
+def think(board, stop):
+    """
+    Returns the computer's move, giving up the search at the think
+    time budget or when stop is set.
+    """
+    if ttt is mnk:
+        return ttt.minimax(board, args.think, stop=stop)
+    return ttt.minimax(board)
+
+
+def cancel_ai():
+    """
+    Stops any search in progress and forgets its move.
+    """
+    global ai_future, ai_stop
+    if ai_future is not None:
+        ai_stop.set()
+        ai_future.cancel()
+    ai_future = None
+    ai_stop = None
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai()
+            executor.shutdown(wait=False)
             sys.exit()
 
     screen.fill(black)
@@ -68,13 +120,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -109,22 +160,24 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, without waiting for it
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_future is None:
+                ai_stop = threading.Event()
+                ai_future = executor.submit(think, board, ai_stop)
+                ai_started = time.monotonic()
+            elif ai_future.done() and \
+                    time.monotonic() - ai_started >= MIN_THINK:
+                move = ai_future.result()
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai_future = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -140,8 +193,9 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel_ai()
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
 
     pygame.display.flip()
+    clock.tick(60)
@@ -3,12 +3,105 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import os
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Each of the 8 symmetries of the board, as a function of a cell (i, j)
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+]
+
+# PERMUTATIONS[s][k] is where symmetry s sends cell k = 3 * i + j
+PERMUTATIONS = [
+    [3 * i2 + j2 for i2, j2 in (s(k // 3, k % 3) for k in range(9))]
+    for s in SYMMETRIES
+]
+INVERSES = [
+    [p.index(k) for k in range(9)] for p in PERMUTATIONS
+]
+
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+
+class TranspositionTable():
+    """
+    Minimax results keyed on the canonical form of a board, the least
+    base-3 encoding over its 8 symmetries, so that equivalent positions
+    share one entry. Moves are stored in canonical coordinates.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def canonical(self, board):
+        """
+        Returns (key, symmetry) for the board's canonical form.
+        """
+        cells = [CELL_CODES[cell] for row in board for cell in row]
+        best = None
+        for s, permutation in enumerate(PERMUTATIONS):
+            key = 0
+            for k in range(9):
+                key += cells[k] * 3 ** permutation[k]
+            if best is None or key < best[0]:
+                best = (key, s)
+        return best
+
+    def get(self, board):
+        """
+        Returns the cached (value, move) for the board, or None.
+        """
+        key, s = self.canonical(board)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value, move = entry
+        if move is not None:
+            k = INVERSES[s][move]
+            move = (k // 3, k % 3)
+        return value, move
+
+    def put(self, board, value, move):
+        key, s = self.canonical(board)
+        if move is not None:
+            move = PERMUTATIONS[s][3 * move[0] + move[1]]
+        self.entries[key] = (value, move)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by every call to minimax, so later moves are instant
+table = TranspositionTable()
+
+# Opening book of every reachable position, built by book.py: one byte
+# per base-3 board encoding, holding the best move in the low 4 bits
+# and the value + 1 in the next two, or BOOK_MISSING
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+BOOK_SIZE = 3 ** 9
+BOOK_MISSING = 0xFF
+BOOK_NO_MOVE = 9
+
+# Contents of BOOK_PATH once loaded, or False if it is unavailable
+book = None
+
 
 def initial_state():
     """
@@ -57,7 +150,7 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    result = copy.deepcopy(board)
+    result = [row[:] for row in board]
     result[action[0]][action[1]] = player(board)
     return result
 
@@ -111,6 +204,9 @@ def minimax(board):
     curr_player = player(board)
     if terminal(board):
         return None
+    entry = book_lookup(board)
+    if entry is not None:
+        return entry[1]
     else:
         if curr_player == X:
             value, move = max_value(board)
@@ -120,9 +216,48 @@ def minimax(board):
             return move
 
 
+def encode(board):
+    """
+    Returns the base-3 encoding of a board, cell (i, j) being
+    the digit 3 * i + j.
+    """
+    code = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            code = code * 3 + CELL_CODES[cell]
+    return code
+
+
+def book_lookup(board):
+    """
+    Returns (value, move) for the board from the opening book,
+    loading it on first use, or None if there is no book entry.
+    """
+    global book
+    if book is None:
+        try:
+            with open(BOOK_PATH, "rb") as f:
+                book = f.read()
+        except OSError:
+            book = False
+        if book and len(book) != BOOK_SIZE:
+            book = False
+    if not book:
+        return None
+    entry = book[encode(board)]
+    if entry == BOOK_MISSING:
+        return None
+    cell = entry & 0xF
+    move = None if cell == BOOK_NO_MOVE else (cell // 3, cell % 3)
+    return (entry >> 4) - 1, move
+
+
 def max_value(board):
     if terminal(board):
         return utility(board), None
+    cached = table.get(board)
+    if cached is not None:
+        return cached
     curr_best = float('-inf')
     optimalMove = None
     for action in actions(board):
@@ -131,14 +266,18 @@ def max_value(board):
             curr_best = v
             optimalMove = action
             if curr_best == 1:
-                return curr_best, optimalMove
+                break
 
+    table.put(board, curr_best, optimalMove)
     return curr_best, optimalMove
 
 
 def min_value(board):
     if terminal(board):
         return utility(board), None
+    cached = table.get(board)
+    if cached is not None:
+        return cached
 
     curr_best = float('inf')
     optimalMove = None
@@ -149,8 +288,9 @@ def min_value(board):
             curr_best = v
             optimalMove = action
             if v == -1:
-                return v, optimalMove
+                break
 
+    table.put(board, curr_best, optimalMove)
     return curr_best, optimalMove
     
 def check_horizontally(board):
@@ -195,4 +335,4 @@ def check_diagonally(board):
             return X
         else:
             return O
-     return None
+    return None
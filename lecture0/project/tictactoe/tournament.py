@@ -0,0 +1,227 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+
+class RandomAgent():
+    """
+    Plays a uniformly random legal move.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def move(self, board):
+        return self.rng.choice(sorted(ttt.actions(board))), 0
+
+
+class MinimaxAgent():
+    """
+    Plain minimax with no memory between positions, on bitboards.
+    """
+
+    def move(self, board):
+        self.nodes = 0
+        x, o = bitboard.encode(board)
+        _, cell = self.search(x, o)
+        return (cell // 3, cell % 3), self.nodes
+
+    def search(self, x, o):
+        self.nodes += 1
+        value = bitboard.score(x, o)
+        if value is not None:
+            return value, None
+        maximizing = bitboard.x_to_move(x, o)
+        best_value, best_cell = None, None
+        for cell in bitboard.empty_cells(x, o):
+            v, _ = self.search(*bitboard.play(x, o, cell))
+            if best_value is None or (v > best_value if maximizing
+                                      else v < best_value):
+                best_value, best_cell = v, cell
+                if best_value == (1 if maximizing else -1):
+                    break
+        return best_value, best_cell
+
+
+class CachedAgent():
+    """
+    tictactoe.minimax, with its opening book and transposition table.
+    Nodes are the table misses the move caused.
+    """
+
+    def move(self, board):
+        misses = ttt.table.misses
+        action = ttt.minimax(board)
+        return action, ttt.table.misses - misses
+
+
+class DepthLimitedAgent():
+    """
+    The mnk alpha-beta search cut off at a fixed depth.
+    """
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.game = mnk.Game(3, 3, 3)
+
+    def move(self, board):
+        found = self.game.search(board, max_depth=self.depth)
+        return found["action"], found["nodes"]
+
+
+def make_agent(spec, seed=None):
+    """
+    Returns the agent for a spec: random, minimax, cached or depth:N.
+    """
+    name, _, argument = spec.partition(":")
+    if name == "random":
+        return RandomAgent(seed)
+    if name == "minimax":
+        return MinimaxAgent()
+    if name == "cached":
+        return CachedAgent()
+    if name == "depth":
+        return DepthLimitedAgent(int(argument or 2))
+    raise ValueError(f"unknown agent: {spec}")
+
+
+def play_game(x_agent, o_agent):
+    """
+    Plays one game. Returns the utility of the final board and a list
+    of (agent index, seconds, nodes) for every move.
+    """
+    agents = (x_agent, o_agent)
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        mover = 0 if ttt.player(board) == ttt.X else 1
+        start = time.perf_counter()
+        action, nodes = agents[mover].move(board)
+        moves.append((mover, time.perf_counter() - start, nodes))
+        board = ttt.result(board, action)
+    return ttt.utility(board), moves
+
+
+def play_match(task):
+    """
+    Plays games between the agents of task, a tuple of
+    (x spec, o spec, number of games, seed).
+    Returns the specs with their outcome counts, move latencies
+    and node totals.
+    """
+    x_spec, o_spec, games, seed = task
+    x_agent = make_agent(x_spec, seed)
+    o_agent = make_agent(o_spec, seed + 1)
+    outcomes = {1: 0, 0: 0, -1: 0}
+    latencies = ([], [])
+    nodes = [0, 0]
+    for _ in range(games):
+        value, moves = play_game(x_agent, o_agent)
+        outcomes[value] += 1
+        for mover, seconds, count in moves:
+            latencies[mover].append(seconds)
+            nodes[mover] += count
+    return x_spec, o_spec, outcomes, latencies, nodes
+
+
+def percentile(values, p):
+    """
+    Returns the nearest-rank p-th percentile of values.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_tournament(specs, games, processes=None, batch=100, seed=0):
+    """
+    Plays games between every ordered pair of agents, as X and as O,
+    in batches over a process pool.
+    Returns per-agent totals and the table of pairings.
+    """
+    tasks = []
+    for x_spec in specs:
+        for o_spec in specs:
+            for start in range(0, games, batch):
+                tasks.append((x_spec, o_spec, min(batch, games - start),
+                              seed + len(tasks) * 2))
+
+    agents = {
+        spec: {"win": 0, "draw": 0, "loss": 0, "latencies": [], "nodes": 0}
+        for spec in specs
+    }
+    pairings = {}
+    with multiprocessing.Pool(processes) as pool:
+        for x_spec, o_spec, outcomes, latencies, nodes in \
+                pool.imap_unordered(play_match, tasks):
+            pairing = pairings.setdefault((x_spec, o_spec), {1: 0, 0: 0, -1: 0})
+            for value, count in outcomes.items():
+                pairing[value] += count
+            agents[x_spec]["win"] += outcomes[1]
+            agents[x_spec]["loss"] += outcomes[-1]
+            agents[x_spec]["draw"] += outcomes[0]
+            agents[o_spec]["win"] += outcomes[-1]
+            agents[o_spec]["loss"] += outcomes[1]
+            agents[o_spec]["draw"] += outcomes[0]
+            agents[x_spec]["latencies"].extend(latencies[0])
+            agents[o_spec]["latencies"].extend(latencies[1])
+            agents[x_spec]["nodes"] += nodes[0]
+            agents[o_spec]["nodes"] += nodes[1]
+    return agents, pairings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play tic-tac-toe agents against each other."
+    )
+    parser.add_argument("--agents", default="random,minimax,cached,depth:2",
+                        help="comma-separated agents: random, minimax, "
+                             "cached, depth:N")
+    parser.add_argument("--games", type=int, default=200,
+                        help="games per ordered pair of agents")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    specs = args.agents.split(",")
+    for spec in specs:
+        make_agent(spec)
+    start = time.perf_counter()
+    agents, pairings = run_tournament(specs, args.games, args.processes,
+                                      seed=args.seed)
+    seconds = time.perf_counter() - start
+
+    total = sum(sum(pairing.values()) for pairing in pairings.values())
+    print(f"{total} games in {seconds:.1f}s")
+    print()
+    print("X \\ O (X wins / draws / O wins)")
+    width = max(len(spec) for spec in specs) + 2
+    print(" " * width + "".join(f"{spec:>18}" for spec in specs))
+    for x_spec in specs:
+        row = f"{x_spec:<{width}}"
+        for o_spec in specs:
+            p = pairings[(x_spec, o_spec)]
+            row += f"{p[1]:>6}/{p[0]:>5}/{p[-1]:>5}"
+        print(row)
+    print()
+    print(f"{'agent':<{width}}{'win':>7}{'draw':>7}{'loss':>7}"
+          f"{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'nodes':>12}")
+    for spec, stats in agents.items():
+        latencies = stats["latencies"]
+        print(f"{spec:<{width}}{stats['win']:>7}{stats['draw']:>7}"
+              f"{stats['loss']:>7}"
+              f"{percentile(latencies, 50) * 1e6:>10.1f}"
+              f"{percentile(latencies, 90) * 1e6:>10.1f}"
+              f"{percentile(latencies, 99) * 1e6:>10.1f}"
+              f"{stats['nodes']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import random
+import time
+
+from logic import And, Implication, Not, Or, Symbol, parallel_check
+
+
+def generate(num_symbols, num_clauses, seed=0):
+    """
+    Returns a knowledge base over num_symbols symbols, a chain of
+    implications from the first symbol to the last plus random
+    clauses of three literals that keep it satisfiable, and a query
+    it entails but that simplification cannot decide.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"S{i}") for i in range(num_symbols)]
+    sentences = [Implication(symbols[i], symbols[i + 1])
+                 for i in range(num_symbols - 1)]
+    # Every clause has a positive literal, so the all-true model holds
+    for _ in range(num_clauses):
+        chosen = rng.sample(symbols, 3)
+        sentences.append(Or(chosen[0], *[
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in chosen[1:]
+        ]))
+    return And(*sentences), Implication(symbols[0], symbols[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time parallel model checking against the core count."
+    )
+    parser.add_argument("--symbols", type=int, default=30)
+    parser.add_argument("--clauses", type=int, default=60)
+    parser.add_argument("--fixed", type=int, default=None,
+                        help="symbols fixed to split the models "
+                             "(default: four slices per process)")
+    parser.add_argument("--processes", type=int, nargs="+", default=None,
+                        help="process counts to time "
+                             "(default: powers of two up to the cores)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count()
+    counts = args.processes
+    if counts is None:
+        counts = [1]
+        while counts[-1] * 2 <= cores:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != cores:
+            counts.append(cores)
+
+    knowledge, query = generate(args.symbols, args.clauses)
+    print(f"{args.symbols} symbols, {args.clauses} clauses, {cores} cores")
+    print(f"{'processes':>9}{'seconds':>10}{'speedup':>9}{'efficiency':>12}")
+    baseline = None
+    for processes in counts:
+        start = time.perf_counter()
+        assert parallel_check(knowledge, query, processes, args.fixed)
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = seconds
+        speedup = baseline / seconds
+        print(f"{processes:>9}{seconds:>10.3f}{speedup:>8.2f}x"
+              f"{speedup / processes:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
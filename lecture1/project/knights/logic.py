@@ -1,7 +1,77 @@
+import functools
 import itertools
+import multiprocessing
+import operator
+import os
+import time
+import weakref
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import sat
+
+# Most symbols for which model_check enumerates models one at a time
+# rather than evaluating whole truth tables
+ENUMERATION_LIMIT = 12
+
+# Most symbols for which model_check evaluates truth tables rather
+# than asking a SAT solver
+TRUTH_TABLE_LIMIT = 20
+
+# Models evaluated together by truth tables, as a power of two
+CHUNK_BITS = 20
 
 
 class Sentence():
+    """
+    Sentences are immutable and interned: building a sentence equal to
+    one that already exists returns the existing one, so equal
+    subsentences share a node and equality is identity. Each node
+    keeps its hash, and compound nodes their symbols once computed.
+    """
+
+    __slots__ = ("_args", "_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, by class and operands
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _intern(cls, args, **fields):
+        """
+        Returns the sentence of class cls with operands args, creating
+        it with attributes fields if there is none yet.
+        """
+        key = (cls, args)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            set_field = object.__setattr__
+            set_field(sentence, "_args", args)
+            set_field(sentence, "_hash", hash((cls.__name__, args)))
+            set_field(sentence, "_symbols", None)
+            for name, value in fields.items():
+                set_field(sentence, name, value)
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Unpickled sentences are interned in the new process
+        return (type(self), self._args)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +83,42 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return frozenset()
+
+    def _cache_symbols(self, symbols):
+        object.__setattr__(self, "_symbols", frozenset(symbols))
+        return self._symbols
+
+    def compile(self, index):
+        """
+        Returns a function of a bitmask model, in which symbol name is
+        true if bit index[name] is set, that evaluates the sentence.
+        """
+        raise Exception("nothing to compile")
+
+    def truth_table(self, columns, true):
+        """
+        Returns the column of the sentence's values in many models at
+        once, given the column of each symbol's values. Columns are
+        either ints used as bitsets or NumPy boolean arrays, and true
+        is the column of all true values.
+        """
+        raise Exception("nothing to evaluate")
+
+    def tseitin(self, cnf):
+        """
+        Returns a literal of cnf's solver equivalent to the sentence,
+        adding the clauses that define it.
+        """
+        raise Exception("nothing to encode")
+
+    def simplify(self, model):
+        """
+        Returns a simpler sentence equivalent to this one given the
+        values of the symbols in model, a partial model, or True or
+        False if that decides it.
+        """
+        raise Exception("nothing to simplify")
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +148,10 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls._intern((name,), name=name)
 
     def __repr__(self):
         return self.name
@@ -66,19 +166,34 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self._symbols or self._cache_symbols((self.name,))
 
+    def compile(self, index):
+        try:
+            bit = 1 << index[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+        return lambda model: model & bit != 0
 
-class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    def truth_table(self, columns, true):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
+
+    def simplify(self, model):
+        return model.get(self.name, self)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+
+class Not(Sentence):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls._intern((operand,), operand=operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -92,20 +207,30 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def compile(self, index):
+        operand = self.operand.compile(index)
+        return lambda model: not operand(model)
+
+    def truth_table(self, columns, true):
+        return true ^ self.operand.truth_table(columns, true)
+
+    def tseitin(self, cnf):
+        return -cnf.literal(self.operand)
+
+    def simplify(self, model):
+        operand = self.operand.simplify(model)
+        if isinstance(operand, bool):
+            return not operand
+        return _negate(operand)
+
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return cls._intern(conjuncts, conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +239,8 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError("sentences are immutable, "
+                        "build And(*conjuncts, conjunct) instead")
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -127,22 +252,61 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self._symbols or self._cache_symbols(frozenset().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        ))
+
+    def compile(self, index):
+        conjuncts = [conjunct.compile(index) for conjunct in self.conjuncts]
+        if len(conjuncts) == 1:
+            return conjuncts[0]
+        if len(conjuncts) == 2:
+            first, second = conjuncts
+            return lambda model: first(model) and second(model)
+        return lambda model: all(f(model) for f in conjuncts)
+
+    def truth_table(self, columns, true):
+        return functools.reduce(operator.and_, [
+            conjunct.truth_table(columns, true) for conjunct in self.conjuncts
+        ], true)
+
+    def tseitin(self, cnf):
+        literals = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        if len(literals) == 1:
+            return literals[0]
+        x = cnf.solver.new_var()
+        for literal in literals:
+            cnf.solver.add_clause([-x, literal])
+        cnf.solver.add_clause([x] + [-literal for literal in literals])
+        return x
+
+    def simplify(self, model):
+        # Flatten nested conjunctions, dropping true and repeated ones
+        conjuncts = {}
+        for conjunct in self.conjuncts:
+            conjunct = conjunct.simplify(model)
+            if conjunct is False:
+                return False
+            if conjunct is True:
+                continue
+            if isinstance(conjunct, And):
+                conjuncts.update(dict.fromkeys(conjunct.conjuncts))
+            else:
+                conjuncts[conjunct] = None
+        if any(_negate(conjunct) in conjuncts for conjunct in conjuncts):
+            return False
+        if len(conjuncts) <= 1:
+            return next(iter(conjuncts), True)
+        return And(*conjuncts)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return cls._intern(disjuncts, disjuncts=disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -158,23 +322,62 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self._symbols or self._cache_symbols(frozenset().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        ))
+
+    def compile(self, index):
+        disjuncts = [disjunct.compile(index) for disjunct in self.disjuncts]
+        if len(disjuncts) == 1:
+            return disjuncts[0]
+        if len(disjuncts) == 2:
+            first, second = disjuncts
+            return lambda model: first(model) or second(model)
+        return lambda model: any(f(model) for f in disjuncts)
+
+    def truth_table(self, columns, true):
+        return functools.reduce(operator.or_, [
+            disjunct.truth_table(columns, true) for disjunct in self.disjuncts
+        ], true ^ true)
+
+    def tseitin(self, cnf):
+        literals = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        if len(literals) == 1:
+            return literals[0]
+        x = cnf.solver.new_var()
+        for literal in literals:
+            cnf.solver.add_clause([x, -literal])
+        cnf.solver.add_clause([-x] + literals)
+        return x
+
+    def simplify(self, model):
+        # Flatten nested disjunctions, dropping false and repeated ones
+        disjuncts = {}
+        for disjunct in self.disjuncts:
+            disjunct = disjunct.simplify(model)
+            if disjunct is True:
+                return True
+            if disjunct is False:
+                continue
+            if isinstance(disjunct, Or):
+                disjuncts.update(dict.fromkeys(disjunct.disjuncts))
+            else:
+                disjuncts[disjunct] = None
+        if any(_negate(disjunct) in disjuncts for disjunct in disjuncts):
+            return True
+        if len(disjuncts) <= 1:
+            return next(iter(disjuncts), False)
+        return Or(*disjuncts)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return cls._intern((antecedent, consequent),
+                           antecedent=antecedent, consequent=consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -189,23 +392,49 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self._symbols or self._cache_symbols(
+            self.antecedent.symbols() | self.consequent.symbols()
+        )
+
+    def compile(self, index):
+        antecedent = self.antecedent.compile(index)
+        consequent = self.consequent.compile(index)
+        return lambda model: not antecedent(model) or consequent(model)
+
+    def truth_table(self, columns, true):
+        return ((true ^ self.antecedent.truth_table(columns, true))
+                | self.consequent.truth_table(columns, true))
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.antecedent)
+        b = cnf.literal(self.consequent)
+        x = cnf.solver.new_var()
+        cnf.solver.add_clause([-x, -a, b])
+        cnf.solver.add_clause([x, a])
+        cnf.solver.add_clause([x, -b])
+        return x
+
+    def simplify(self, model):
+        antecedent = self.antecedent.simplify(model)
+        consequent = self.consequent.simplify(model)
+        if antecedent is False or consequent is True:
+            return True
+        if antecedent is True:
+            return consequent
+        if consequent is False:
+            return _negate(antecedent)
+        if antecedent is consequent:
+            return True
+        return Implication(antecedent, consequent)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return cls._intern((left, right), left=left, right=right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -222,42 +451,477 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
+        return self._symbols or self._cache_symbols(
+            self.left.symbols() | self.right.symbols()
+        )
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+    def compile(self, index):
+        left = self.left.compile(index)
+        right = self.right.compile(index)
+        # Each side is evaluated once
+        return lambda model: bool(left(model)) == bool(right(model))
+
+    def truth_table(self, columns, true):
+        return true ^ (self.left.truth_table(columns, true)
+                       ^ self.right.truth_table(columns, true))
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        x = cnf.solver.new_var()
+        cnf.solver.add_clause([-x, -a, b])
+        cnf.solver.add_clause([-x, a, -b])
+        cnf.solver.add_clause([x, a, b])
+        cnf.solver.add_clause([x, -a, -b])
+        return x
+
+    def simplify(self, model):
+        left = self.left.simplify(model)
+        right = self.right.simplify(model)
+        if isinstance(left, bool) and isinstance(right, bool):
+            return left == right
+        if isinstance(left, bool):
+            left, right = right, left
+        if right is True:
+            return left
+        if right is False:
+            return _negate(left)
+        if left is right:
             return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        if _negate(left) is right:
+            return False
+        return Biconditional(left, right)
+
+
+def _negate(sentence):
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+class CNF():
+    """
+    Tseitin encoding of sentences into the clauses of a SAT solver.
+    Every compound sentence gets a variable equivalent to it, so the
+    clauses grow linearly with the sentences rather than exponentially.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = sat.Solver() if solver is None else solver
+        self.variables = {}
+        self.definitions = {}
+
+    def variable(self, name):
+        """
+        Returns the solver variable of a symbol.
+        """
+        var = self.variables.get(name)
+        if var is None:
+            var = self.variables[name] = self.solver.new_var()
+        return var
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to sentence, encoding each distinct
+        sentence only once.
+        """
+        literal = self.definitions.get(sentence)
+        if literal is None:
+            literal = self.definitions[sentence] = sentence.tseitin(self)
+        return literal
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring sentence to be true. Returns False if
+        the clauses are now known to be unsatisfiable.
+        """
+        if isinstance(sentence, And):
+            return all([self.add(conjunct) for conjunct in sentence.conjuncts])
+        if isinstance(sentence, Or):
+            return self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        return self.solver.add_clause([self.literal(sentence)])
+
+
+class KnowledgeBase():
+    """
+    A session of entailment queries against one knowledge base.
+
+    The knowledge is encoded into a SAT solver once, and each query is
+    a solve under the assumption that the query is false, so clauses
+    learned answering one query carry over to the next. Every query is
+    timed in timings as (query, entailed, seconds, conflicts).
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.timings = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence to the knowledge base.
+        """
+        Sentence.validate(sentence)
+        self.cnf.add(sentence)
+
+    def entails(self, query):
+        """
+        Checks if the knowledge base entails query.
+        """
+        start = time.perf_counter()
+        conflicts = self.cnf.solver.conflicts
+        entailed = not self.cnf.solver.solve([-self.cnf.literal(query)])
+        self.timings.append((query, entailed,
+                             time.perf_counter() - start,
+                             self.cnf.solver.conflicts - conflicts))
+        return entailed
+
+    def entails_all(self, queries):
+        """
+        Checks which of queries the knowledge base entails.
+        Returns a list of booleans in the order of queries.
+        """
+        return [self.entails(query) for query in queries]
+
+    def report(self):
+        """
+        Returns a line per query so far with its answer and timing.
+        """
+        return "\n".join(
+            f"{seconds * 1e6:10.1f} us {conflicts:6} conflicts  "
+            f"{'yes' if entailed else 'no ':3}  {query.formula()}"
+            for query, entailed, seconds, conflicts in self.timings
+        )
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+@functools.lru_cache(maxsize=128)
+def preprocess(knowledge):
+    """
+    Simplifies a knowledge base and propagates its top-level literals.
+    Returns the values those literals give their symbols and the
+    remaining conjuncts split into parts sharing no symbols, each an
+    And, or None if the knowledge base simplifies to false.
+    """
+    units = {}
+    conjuncts = [knowledge]
+    while True:
+        sentence = And(*conjuncts).simplify(units)
+        if sentence is False:
+            return None
+        if sentence is True:
+            conjuncts = []
+        elif isinstance(sentence, And):
+            conjuncts = list(sentence.conjuncts)
+        else:
+            conjuncts = [sentence]
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        remaining = []
+        for conjunct in conjuncts:
+            if isinstance(conjunct, Symbol):
+                units[conjunct.name] = True
+            elif isinstance(conjunct, Not) and isinstance(conjunct.operand,
+                                                           Symbol):
+                units[conjunct.operand.name] = False
+            else:
+                remaining.append(conjunct)
+        if len(remaining) == len(conjuncts):
+            break
+        conjuncts = remaining
+
+    # Group conjuncts connected through shared symbols
+    parent = {}
+
+    def find(symbol):
+        while parent.setdefault(symbol, symbol) != symbol:
+            parent[symbol] = parent[parent[symbol]]
+            symbol = parent[symbol]
+        return symbol
+
+    for conjunct in conjuncts:
+        symbols = iter(conjunct.symbols())
+        root = find(next(symbols))
+        for symbol in symbols:
+            parent[find(symbol)] = root
+    parts = {}
+    for conjunct in conjuncts:
+        parts.setdefault(find(next(iter(conjunct.symbols()))), []).append(
+            conjunct
+        )
+    return units, [And(*part) for part in parts.values()]
+
+
+def restrict(knowledge, queries):
+    """
+    Reduces checking queries against a knowledge base to checking them
+    against the preprocessed parts of it that share symbols with them.
+    Returns the conjunction of those parts and the queries simplified
+    under the knowledge base's literals, which may make them True or
+    False, or None if the knowledge base is unsatisfiable.
+    """
+    preprocessed = preprocess(knowledge)
+    if preprocessed is None:
+        return None
+    units, parts = preprocessed
+    queries = [query.simplify(units) for query in queries]
+    symbols = frozenset().union(*[
+        query.symbols() for query in queries if not isinstance(query, bool)
+    ])
+
+    # A part sharing no symbols with the queries cannot affect them,
+    # unless it cannot be true at all
+    relevant = []
+    for part in parts:
+        if part.symbols() & symbols:
+            relevant.extend(part.conjuncts)
+        elif not satisfiable(part):
+            return None
+    return And(*relevant), queries
+
+
+@functools.lru_cache(maxsize=1024)
+def satisfiable(sentence):
+    """
+    Checks if some model makes sentence true.
+    """
+    symbols = sentence.symbols()
+    if len(symbols) > TRUTH_TABLE_LIMIT:
+        cnf = CNF()
+        return cnf.add(sentence) and cnf.solver.solve()
+    if len(symbols) > ENUMERATION_LIMIT:
+        return any(
+            _any(sentence.truth_table(columns, true))
+            for columns, true in truth_tables(sorted(symbols), CHUNK_BITS)
+        )
+    return bool(satisfying_models(sentence)[1])
+
+
+@functools.lru_cache(maxsize=128)
+def satisfying_models(knowledge):
+    """
+    Returns the symbols of a knowledge base, sorted, and the models
+    in which it is true, as bitmasks with bit i set if symbols[i] is.
+    Results are cached, so many queries against the same knowledge
+    base only enumerate its models once.
+    """
+    symbols = tuple(sorted(knowledge.symbols()))
+    evaluate = knowledge.compile(
+        {symbol: i for i, symbol in enumerate(symbols)}
+    )
+    return symbols, tuple(
+        model for model in range(2 ** len(symbols)) if evaluate(model)
+    )
+
+
+def model_check(knowledge, query, processes=None):
+    """
+    Checks if knowledge base entails query, over processes
+    worker processes if given.
+    """
+
+    restricted = restrict(knowledge, [query])
+    if restricted is None:
+        return True
+    knowledge, (query,) = restricted
+    if isinstance(query, bool):
+        return query or not satisfiable(knowledge)
+    if processes is not None:
+        return parallel_check(knowledge, query, processes)
+
+    symbols = knowledge.symbols() | query.symbols()
+    if len(symbols) > TRUTH_TABLE_LIMIT:
+        return sat_check(knowledge, query)
+    if len(symbols) > ENUMERATION_LIMIT:
+        return _check_all(knowledge, [query])[0]
+
+    # Number the query's own symbols after those of the knowledge base
+    symbols, models = satisfying_models(knowledge)
+    extra = sorted(query.symbols().difference(symbols))
+    index = {symbol: i for i, symbol in enumerate(symbols + tuple(extra))}
+    query = query.compile(index)
+
+    # If knowledge base is true in a model, then query must also be true,
+    # whatever the symbols it does not mention
+    shift = len(symbols)
+    for model in models:
+        for rest in range(2 ** len(extra)):
+            if not query(model | rest << shift):
+                return False
+    return True
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by asking a SAT solver
+    whether the knowledge base can be true with the query false.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    return not cnf.solver.solve([-cnf.literal(query)])
+
+
+def parallel_check(knowledge, query, processes=None, fixed=None):
+    """
+    Checks if knowledge base entails query by fixing the first fixed
+    symbols in each possible way and checking the resulting slices of
+    the models in a pool of processes (by default one per core).
+    As soon as any slice has a model of the knowledge base in which
+    the query is false, the other workers are told to stop.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    if processes is None:
+        processes = os.cpu_count()
+    if fixed is None:
+        # Several slices per process even out their differing costs
+        fixed = (4 * processes - 1).bit_length()
+    fixed = min(fixed, len(symbols))
+
+    # Workers check stop between chunks of models, and skip the
+    # slices still queued once it is set
+    stop = multiprocessing.Event()
+    pool = multiprocessing.Pool(processes, _start_slices,
+                                (knowledge, query, symbols[:fixed], stop))
+    try:
+        for entailed in pool.imap_unordered(_check_slice, range(2 ** fixed)):
+            if not entailed:
+                return False
+        return True
+    finally:
+        stop.set()
+        pool.close()
+        pool.join()
+
+
+# Knowledge base, query, fixed symbols and stop event of this
+# worker's slices
+_slices = None
+
+
+def _start_slices(knowledge, query, symbols, stop):
+    global _slices
+    _slices = knowledge, query, symbols, stop
+
+
+def _check_slice(i):
+    """
+    Checks entailment in the models where fixed symbol j has the
+    value of bit j of i.
+    """
+    knowledge, query, symbols, stop = _slices
+    if stop.is_set():
+        return True
+    model = {symbol: bool(i >> j & 1) for j, symbol in enumerate(symbols)}
+    knowledge = knowledge.simplify(model)
+    query = query.simplify(model)
+    if knowledge is False or query is True:
+        return True
+    if knowledge is True:
+        knowledge = And()
+    if query is False:
+        return not satisfiable(knowledge)
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    return _truth_table_check(knowledge, [query], symbols, stop)[0]
+
+
+def truth_tables(symbols, chunk_bits=CHUNK_BITS):
+    """
+    Yields the columns of each symbol's values over all models of
+    symbols, 2 ** chunk_bits models at a time, with the all true
+    column. Model m of a chunk gives symbols[i] the value of bit i of m
+    for the first chunk_bits symbols, and the rest are constant.
+    """
+    low = min(len(symbols), chunk_bits)
+    size = 2 ** low
+    if numpy is not None:
+        models = numpy.arange(size)
+        true = numpy.ones(size, dtype=bool)
+        false = numpy.zeros(size, dtype=bool)
+        low_columns = [(models >> i & 1).astype(bool) for i in range(low)]
+    else:
+        true = (1 << size) - 1
+        false = 0
+        low_columns = []
+        for i in range(low):
+            # Symbol i repeats 2 ** i false values then 2 ** i true ones,
+            # doubled until the pattern covers the chunk
+            width = 2 << i
+            column = (1 << (1 << i)) - 1 << (1 << i)
+            while width < size:
+                column |= column << width
+                width *= 2
+            low_columns.append(column)
+
+    for chunk in range(2 ** (len(symbols) - low)):
+        columns = dict(zip(symbols, low_columns))
+        for i in range(low, len(symbols)):
+            columns[symbols[i]] = true if chunk >> (i - low) & 1 else false
+        yield columns, true
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks which of queries the knowledge base entails. Queries are
+    grouped by the parts of the knowledge base they share symbols with,
+    and each group is checked against its parts alone, evaluating each
+    sentence once per chunk of models over whole truth tables, or in a
+    KnowledgeBase session above TRUTH_TABLE_LIMIT symbols.
+    Returns a list of booleans in the order of queries.
+    """
+    queries = list(queries)
+    entailed = [None] * len(queries)
+    groups = {}
+    for i, query in enumerate(queries):
+        restricted = restrict(knowledge, [query])
+        if restricted is None:
+            return [True] * len(queries)
+        parts, (query,) = restricted
+        if isinstance(query, bool):
+            entailed[i] = query or not satisfiable(parts)
+        else:
+            groups.setdefault(parts, []).append((i, query))
+
+    # Restricted knowledge is interned, so equal parts group together
+    for parts, group in groups.items():
+        answers = _check_all(parts, [query for _, query in group])
+        for (i, _), answer in zip(group, answers):
+            entailed[i] = answer
+    return entailed
+
+
+def _check_all(knowledge, queries):
+    if not queries:
+        return []
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    if len(symbols) > TRUTH_TABLE_LIMIT:
+        return KnowledgeBase(knowledge).entails_all(queries)
+    return _truth_table_check(knowledge, queries, symbols)
+
+
+def _truth_table_check(knowledge, queries, symbols, stop=None):
+    entailed = [True] * len(queries)
+    for columns, true in truth_tables(symbols, CHUNK_BITS):
+        if stop is not None and stop.is_set():
+            break
+        models = knowledge.truth_table(columns, true)
+        if not _any(models):
+            continue
+        for i, query in enumerate(queries):
+            # A model of the knowledge base where the query is false
+            # is a counterexample
+            if entailed[i] and _any(
+                models & (true ^ query.truth_table(columns, true))
+            ):
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def _any(column):
+    if isinstance(column, int):
+        return column != 0
+    return bool(column.any())
@@ -95,8 +95,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            entailed = model_check_all(knowledge, symbols)
+            for symbol, holds in zip(symbols, entailed):
+                if holds:
                     print(f"    {symbol}")
 
 
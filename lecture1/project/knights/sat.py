@@ -0,0 +1,318 @@
+"""
+Conflict-driven clause learning SAT solver
+
+Variables are numbered from 1 and a literal is a variable or its
+negation, as in the DIMACS format. Clauses are lists of literals.
+The solver propagates units through two watched literals per clause,
+learns a clause from the first unique implication point of every
+conflict and jumps back to where that clause becomes unit.
+Learned clauses are kept between calls to solve, so a stream of
+queries under different assumptions gets faster as it goes.
+"""
+
+import heapq
+
+# Conflicts before the first restart; later restarts follow the
+# Luby sequence in multiples of this
+RESTART_BASE = 100
+
+# Activity decay, applied by growing the bump instead
+ACTIVITY_DECAY = 0.95
+
+
+def luby(i):
+    """
+    Returns the i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Solver():
+
+    def __init__(self, num_vars=0):
+        self.num_vars = 0
+        self.value = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.watches = {}
+        self.clauses = []
+        self.learned = []
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.order = []
+        self.bump = 1.0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        for _ in range(num_vars):
+            self.new_var()
+
+    def new_var(self):
+        """
+        Adds a variable and returns its number.
+        """
+        self.num_vars += 1
+        var = self.num_vars
+        self.value.append(0)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def literal_value(self, literal):
+        """
+        Returns 1 if literal is true, -1 if false and 0 if unassigned.
+        """
+        value = self.value[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable, True otherwise.
+        """
+        if not self.ok:
+            return False
+        self._backtrack(0)
+
+        # Drop duplicates and literals false at the top level;
+        # a clause with a true literal or a complementary pair is satisfied
+        clause = []
+        for literal in literals:
+            value = self.literal_value(literal)
+            if value == 1 or -literal in clause:
+                return True
+            if value == 0 and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._assign(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._watch(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal
+        of assumptions true, saving the satisfying assignment in model
+        (indexed by variable), or False if they are not.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        if self._propagate() is not None:
+            self.ok = False
+            return False
+
+        restarts = 0
+        budget = RESTART_BASE
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                budget -= 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learned, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    self._watch(learned)
+                    self.learned.append(learned)
+                    self._assign(learned[0], learned)
+                self.bump /= ACTIVITY_DECAY
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = RESTART_BASE * luby(restarts + 1)
+                self._backtrack(0)
+                continue
+
+            # Assumptions are decided first, one per decision level
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.literal_value(literal)
+                if value == -1:
+                    self._backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self._assign(literal, None)
+                continue
+
+            var = self._pick()
+            if var is None:
+                self.model = [value == 1 for value in self.value]
+                self._backtrack(0)
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self._assign(var if self.phase[var] else -var, None)
+
+    def _watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _assign(self, literal, reason):
+        var = abs(literal)
+        self.value[var] = 1 if literal > 0 else -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        """
+        Assigns the literals implied by unit clauses. Returns a clause
+        with every literal false if there is a conflict, else None.
+        """
+        value = self.value
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watchers = self.watches[false_literal]
+            kept = []
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+                # Keep the false literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                first_value = value[abs(first)] if first > 0 \
+                    else -value[abs(first)]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (value[literal] if literal > 0
+                            else -value[-literal]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept.extend(watchers[i:])
+                        self.watches[false_literal] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+                    self._assign(first, clause)
+            self.watches[false_literal] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, with the literal it
+        asserts first and one from the level to jump back to second,
+        and that level.
+        """
+        level = len(self.trail_lim)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail)
+        clause = conflict
+        while True:
+            for other in clause:
+                var = abs(other)
+                if var in seen or literal is not None and var == abs(literal):
+                    continue
+                if self.level[var] == 0:
+                    continue
+                seen.add(var)
+                self._bump(var)
+                if self.level[var] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest literal of this level in the conflict
+            index -= 1
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learned[0] = -literal
+
+        back = 0
+        if len(learned) > 1:
+            best = max(range(1, len(learned)),
+                       key=lambda k: self.level[abs(learned[k])])
+            learned[1], learned[best] = learned[best], learned[1]
+            back = self.level[abs(learned[1])]
+        return learned, back
+
+    def _bump(self, var):
+        self.activity[var] += self.bump
+        if self.activity[var] > 1e100:
+            for v in range(1, self.num_vars + 1):
+                self.activity[v] *= 1e-100
+            self.bump *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.num_vars + 1)
+                          if self.value[v] == 0]
+            heapq.heapify(self.order)
+        elif self.value[var] == 0:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def _pick(self):
+        """
+        Returns the unassigned variable of highest activity, or None.
+        """
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if self.value[var] == 0 and -activity == self.activity[var]:
+                return var
+        for var in range(1, self.num_vars + 1):
+            if self.value[var] == 0:
+                return var
+        return None
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phase[var] = literal > 0
+            self.value[var] = 0
+            self.reason[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
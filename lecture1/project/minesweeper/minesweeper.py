@@ -1,5 +1,15 @@
 import itertools
+import math
+from fractions import Fraction
 import random
+import time
+
+# Seconds make_random_move may spend enumerating mine configurations
+GUESS_SECONDS = 0.2
+
+# Random configurations drawn for a component too large to enumerate
+# in time
+SAMPLES = 200
 
 
 class Minesweeper():
@@ -147,11 +157,12 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8):
 
-        # Set initial height and width
+        # Set initial height, width and number of mines
         self.height = height
         self.width = width
+        self.total_mines = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -160,26 +171,46 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences known to be true, as their count by their cells,
+        # so identical sentences are stored once
+        self.sentences = {}
+
+        # Cells of every sentence containing each cell
+        self.containing = {}
+
+        # Cells of sentences added or changed since they were last used
+        # for inference
+        self.worklist = []
+
+        # Safe cells not yet chosen
+        self.safe_moves = set()
+
+        # Cells not yet known to be safe or mines
+        self.unknown = set(itertools.product(range(height), range(width)))
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return [Sentence(cells, count)
+                for cells, count in self.sentences.items()]
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self._mark(cell, True)
+        self._infer()
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self._mark(cell, False)
+        self._infer()
 
     def add_knowledge(self, cell, count):
         """
@@ -198,48 +229,96 @@ class MinesweeperAI():
         """
 
         self.moves_made.add(cell)
-        self.mark_safe(cell)
-        i = list(cell)[0]
-        j = list(cell)[1]
+        self.safe_moves.discard(cell)
+        self._mark(cell, False)
+        i, j = cell
         neighbors = set()
-        for a in range(max(0, i-1), min(i+2, self.height)):
-            for b in range(max(0, j-1), min(j+2, self.width)):
-                coordinate = (a, b)
-                if coordinate != (i, j):
-                    neighbors.add(coordinate)
-
-        tmp = Sentence(neighbors, count)
-        self.knowledge.append(tmp)
-        # Update mines and safes
-        
-        while True:
-            loop = False
-            for knowledge in self.knowledge:
-                for cell in knowledge.known_safes():
-                    self.mark_safe(cell)
-                    loop = True
-                for cell in knowledge.known_mines():
-                    self.mark_mine(cell)
-                    loop = True
-            if loop == False:
-                break
-            else:
+        for a in range(max(0, i - 1), min(i + 2, self.height)):
+            for b in range(max(0, j - 1), min(j + 2, self.width)):
+                if (a, b) != cell:
+                    neighbors.add((a, b))
+        self._add(neighbors, count)
+        self._infer()
+
+    def _add(self, cells, count):
+        """
+        Adds the sentence that count of cells are mines, less the
+        cells already known, unless it is empty or already known.
+        """
+        cells = set(cells)
+        count -= len(cells & self.mines)
+        cells = frozenset(cells - self.mines - self.safes)
+        if not cells or cells in self.sentences:
+            return
+        self.sentences[cells] = count
+        for cell in cells:
+            self.containing.setdefault(cell, set()).add(cells)
+        self.worklist.append(cells)
+
+    def _remove(self, cells):
+        """
+        Removes a sentence, returning its count.
+        """
+        count = self.sentences.pop(cells)
+        for cell in cells:
+            containing = self.containing.get(cell)
+            if containing is not None:
+                containing.discard(cells)
+        return count
+
+    def _mark(self, cell, mine):
+        """
+        Records that a cell is a mine or safe, rewriting only the
+        sentences that contain it.
+        """
+        if cell in self.mines or cell in self.safes:
+            return
+        self.unknown.discard(cell)
+        if mine:
+            self.mines.add(cell)
+        else:
+            self.safes.add(cell)
+            if cell not in self.moves_made:
+                self.safe_moves.add(cell)
+        for cells in self.containing.pop(cell, ()):
+            if cells in self.sentences:
+                self._add(cells, self._remove(cells))
+
+    def _infer(self):
+        """
+        Draws conclusions from the sentences on the worklist until
+        nothing new follows. Only sentences sharing a cell with a
+        changed one can be its subset or superset, so each step looks
+        at that neighborhood rather than the whole knowledge base.
+        """
+        while self.worklist:
+            cells = self.worklist.pop()
+            count = self.sentences.get(cells)
+            if count is None:
+                continue
+
+            if count == 0 or count == len(cells):
+                self._remove(cells)
+                for cell in cells:
+                    self._mark(cell, count > 0)
                 continue
-        for sentence in self.knowledge:
-            if sentence.cells == set():
-                self.knowledge.remove(sentence)
-            
-        for x in self.knowledge:
-            if not tmp.cells:
-                break
-            if x.cells == tmp.cells:
-                break
-            buffer = None
-            if sentence.cells.issubset(tmp.cells):
-                self.knowledge.append(Sentence(tmp.cells-sentence.cells, tmp.count-sentence.count))
-            if tmp.cells.issubset(sentence.cells):
-                self.knowledge.append(Sentence(sentence.cells-tmp.cells, sentence.count-tmp.count))
-            
+
+            related = set()
+            for cell in cells:
+                related.update(self.containing.get(cell, ()))
+            related.discard(cells)
+            # A superset says no more than its subset and their difference,
+            # so the difference replaces it
+            for other in related:
+                if other not in self.sentences:
+                    continue
+                if other < cells:
+                    self._remove(cells)
+                    self._add(cells - other, count - self.sentences[other])
+                    break
+                if cells < other:
+                    other_count = self._remove(other)
+                    self._add(other - cells, other_count - count)
 
     def make_safe_move(self):
         """
@@ -250,9 +329,8 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if not cell in self.moves_made:
-                return cell
+        for cell in self.safe_moves:
+            return cell
         return None
 
     def make_random_move(self):
@@ -261,13 +339,241 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Of those, picks one of the cells least likely to be a mine.
         """
-        all_cells = set()
-        for i in range(self.height):
-            for x in range(self.width):
-                all_cells.add((x, i))
-        buffer = list(all_cells - self.moves_made - self.mines)
-        print(buffer)
-        if len(buffer) != 0:
-            return random.choice(buffer)
-        return None
+        probabilities = self.mine_probabilities()
+        if not probabilities:
+            return None
+        lowest = min(probabilities.values())
+        return random.choice([
+            cell for cell, probability in probabilities.items()
+            if probability <= lowest + 1e-9
+        ])
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell not yet chosen or known
+        to be a mine is a mine, given the knowledge and the number of
+        mines on the board.
+
+        Cells in sentences are split into components that share no
+        sentence. The mine configurations of each are enumerated by
+        backtracking, or sampled if that runs past GUESS_SECONDS, and
+        counted by their number of mines. The components are then
+        combined with the cells no sentence mentions, which can hold
+        the remaining mines in any arrangement.
+        """
+        probabilities = {cell: 0.0 for cell in self.safe_moves}
+        if not self.unknown:
+            return probabilities
+        deadline = time.perf_counter() + GUESS_SECONDS
+        remaining = self.total_mines - len(self.mines)
+        components = [
+            self._count_configurations(cells, remaining, deadline)
+            for cells in self._components()
+        ]
+        frontier = set()
+        for cells, _, _ in components:
+            frontier.update(cells)
+        free = len(self.unknown) - len(frontier)
+
+        # Mine count distributions of all components before and after
+        # each one, to combine the others without it
+        before = [{0: 1}]
+        for _, weights, _ in components:
+            before.append(_convolve(before[-1], weights))
+        after = [{0: 1}]
+        for _, weights, _ in reversed(components):
+            after.append(_convolve(after[-1], weights))
+        after.reverse()
+
+        def arrangements(mines, cells=free):
+            if 0 <= mines <= cells:
+                return math.comb(cells, mines)
+            return 0
+
+        total = sum(weight * arrangements(remaining - mines)
+                    for mines, weight in before[-1].items())
+        if total == 0:
+            # The knowledge and mine count disagree, so assume nothing
+            for cell in self.unknown:
+                probabilities[cell] = 0.5
+            return probabilities
+
+        for i, (cells, weights, cell_weights) in enumerate(components):
+            others = _convolve(before[i], after[i + 1])
+            rest = {
+                mines: sum(weight * arrangements(remaining - mines - more)
+                           for more, weight in others.items())
+                for mines in weights
+            }
+            for cell in cells:
+                probabilities[cell] = float(sum(
+                    weight * rest[mines]
+                    for mines, weight in cell_weights[cell].items()
+                ) / total)
+
+        if free:
+            # A given free cell is a mine in the arrangements of the
+            # other mines over the other free cells
+            free_probability = sum(
+                weight * arrangements(remaining - mines - 1, free - 1)
+                for mines, weight in before[-1].items()
+            ) / total
+            for cell in self.unknown - frontier:
+                probabilities[cell] = free_probability
+        return probabilities
+
+    def _components(self):
+        """
+        Returns the cells of the sentences grouped into components
+        that share no sentence.
+        """
+        components = []
+        seen = set()
+        for start in self.containing:
+            if start in seen or not self.containing[start]:
+                continue
+            seen.add(start)
+            component = [start]
+            for cell in component:
+                for cells in self.containing[cell]:
+                    for other in cells:
+                        if other not in seen:
+                            seen.add(other)
+                            component.append(other)
+            components.append(component)
+        return components
+
+    def _count_configurations(self, cells, remaining, deadline):
+        """
+        Counts the assignments of mines to cells consistent with the
+        sentences about them, using at most remaining mines.
+        Returns the cells, the number of assignments by their number of
+        mines, and for each cell the number of those in which it is a
+        mine. Counts are exact unless the deadline passes, in which case
+        they come from SAMPLES random consistent assignments instead.
+        """
+        index = {cell: i for i, cell in enumerate(cells)}
+        constraints = []
+        for cell in cells:
+            for sentence in self.containing[cell]:
+                constraints.append(sentence)
+        constraints = list(dict.fromkeys(constraints))
+        counts = [self.sentences[sentence] for sentence in constraints]
+        in_constraints = [[] for _ in cells]
+        for c, sentence in enumerate(constraints):
+            for cell in sentence:
+                in_constraints[index[cell]].append(c)
+
+        weights = {}
+        cell_weights = [{} for _ in cells]
+
+        def record(assignment, mines):
+            weights[mines] = weights.get(mines, 0) + 1
+            for i, value in enumerate(assignment):
+                if value:
+                    cell_weights[i][mines] = cell_weights[i].get(mines, 0) + 1
+
+        try:
+            _backtrack(in_constraints, constraints, counts, remaining,
+                       record, deadline, shuffle=False)
+        except TimeoutError:
+            weights.clear()
+            cell_weights = [{} for _ in cells]
+            for _ in range(SAMPLES):
+                try:
+                    _backtrack(in_constraints, constraints, counts, remaining,
+                               record, deadline + GUESS_SECONDS, shuffle=True)
+                except TimeoutError:
+                    break
+
+        if not weights:
+            # No time to find any configuration, so treat every cell as
+            # a mine in proportion to the counts of its sentences
+            weights = {0: 1}
+            for i, cell in enumerate(cells):
+                sentences = self.containing[cell]
+                cell_weights[i] = {0: sum(
+                    Fraction(self.sentences[s], len(s)) for s in sentences
+                ) / len(sentences)}
+        return cells, weights, dict(zip(cells, cell_weights))
+
+
+def _backtrack(in_constraints, constraints, counts, remaining, record,
+               deadline, shuffle):
+    """
+    Searches assignments of 0 or 1 mines to cells 0, 1, ... in order,
+    where in_constraints[i] lists the constraints containing cell i and
+    constraint c needs exactly counts[c] mines, passing each consistent
+    assignment and its number of mines to record. With shuffle, values
+    are tried in random order and the search stops at the first one.
+    Raises TimeoutError once the deadline passes.
+    """
+    n = len(in_constraints)
+    mines_in = [0] * len(constraints)
+    open_in = [len(sentence) for sentence in constraints]
+    assignment = [0] * n
+    tried = [0] * n
+    orders = [(0, 1)] * n
+    mines = 0
+    steps = 0
+    i = 0
+    if shuffle:
+        orders[0] = random.sample((0, 1), 2)
+
+    while i >= 0:
+        steps += 1
+        if steps & 1023 == 0 and time.perf_counter() > deadline:
+            raise TimeoutError()
+
+        if i == n:
+            record(assignment, mines)
+            if shuffle:
+                return
+            i -= 1
+        else:
+            # Try the next value of cell i that keeps every constraint
+            # satisfiable
+            placed = False
+            while tried[i] < 2 and not placed:
+                value = orders[i][tried[i]]
+                tried[i] += 1
+                placed = mines + value <= remaining and all(
+                    mines_in[c] + value <= counts[c]
+                    <= mines_in[c] + value + open_in[c] - 1
+                    for c in in_constraints[i]
+                )
+            if placed:
+                assignment[i] = value
+                mines += value
+                for c in in_constraints[i]:
+                    mines_in[c] += value
+                    open_in[c] -= 1
+                i += 1
+                if i < n:
+                    tried[i] = 0
+                    if shuffle:
+                        orders[i] = random.sample((0, 1), 2)
+                continue
+            i -= 1
+
+        # Undo cell i to try its next value
+        if i >= 0:
+            value = assignment[i]
+            mines -= value
+            for c in in_constraints[i]:
+                mines_in[c] -= value
+                open_in[c] += 1
+
+
+def _convolve(a, b):
+    """
+    Returns the distribution of the sum of two mine counts, given
+    the weight of each count.
+    """
+    result = {}
+    for x, wx in a.items():
+        for y, wy in b.items():
+            result[x + y] = result.get(x + y, 0) + wx * wy
+    return result